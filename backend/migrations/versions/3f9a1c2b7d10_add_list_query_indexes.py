@@ -0,0 +1,52 @@
+"""add indexes for list queries
+
+为各列表接口的过滤/排序方式补充复合索引与部分索引。
+PostgreSQL 上使用 CREATE INDEX CONCURRENTLY，建索引期间不锁写。
+库表由 db.create_all() 创建时模型中已声明这些索引，因此均带 IF NOT EXISTS。
+
+Revision ID: 3f9a1c2b7d10
+Revises:
+Create Date: 2026-10-18 10:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2b7d10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (索引名, 表名, 列, 部分索引条件)
+INDEXES = [
+    ('ix_achievements_leader_status_created', 'achievements', ['leader_id', 'status', 'created_at'], None),
+    ('ix_achievements_submitter_created', 'achievements', ['submitter_id', 'created_at'], None),
+    ('ix_achievements_status_created', 'achievements', ['status', 'created_at'], None),
+    ('ix_achievements_created', 'achievements', ['created_at'], None),
+    ('ix_achievements_public_award_date', 'achievements', ['award_date'], "is_public = true AND status = 'approved'"),
+    ('ix_logs_achievement_time', 'logs', ['achievement_id', 'audit_time'], None),
+    ('ix_logs_auditor_time', 'logs', ['auditor_id', 'audit_time'], None),
+    ('ix_users_created_at', 'users', ['created_at'], None),
+]
+
+
+def upgrade():
+    # CONCURRENTLY 不能在事务中执行，需要切换到自动提交
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                sqlite_where=sa.text(where.replace('true', '1')) if where else None
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
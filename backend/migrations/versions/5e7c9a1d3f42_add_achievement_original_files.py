@@ -0,0 +1,26 @@
+"""add achievements.original_files
+
+保存图片规范化前保留的原图地址（IMAGE_KEEP_ORIGINAL），作为清理未引用文件时的引用。
+
+Revision ID: 5e7c9a1d3f42
+Revises: c41e7a9d5b28
+Create Date: 2026-10-18 16:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e7c9a1d3f42'
+down_revision = 'c41e7a9d5b28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('achievements', sa.Column('original_files', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('achievements', 'original_files')
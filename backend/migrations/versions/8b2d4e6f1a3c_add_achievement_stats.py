@@ -0,0 +1,66 @@
+"""add achievement_stats rollup table
+
+新增成果统计汇总表，并按现有 achievements 数据初始化计数。
+
+Revision ID: 8b2d4e6f1a3c
+Revises: 3f9a1c2b7d10
+Create Date: 2026-10-18 11:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2d4e6f1a3c'
+down_revision = '3f9a1c2b7d10'
+branch_labels = None
+depends_on = None
+
+
+KEY_COLUMNS = ['scope', 'scope_id', 'status', 'type', 'level', 'award_year']
+
+
+def upgrade():
+    stats = op.create_table(
+        'achievement_stats',
+        sa.Column('scope', sa.String(length=20), nullable=False),
+        sa.Column('scope_id', sa.String(length=36), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('type', sa.String(length=20), nullable=False),
+        sa.Column('level', sa.String(length=20), nullable=False),
+        sa.Column('award_year', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint(*KEY_COLUMNS)
+    )
+
+    achievements = sa.table(
+        'achievements',
+        sa.column('achievement_id', sa.String),
+        sa.column('leader_id', sa.String),
+        sa.column('submitter_id', sa.String),
+        sa.column('class_id', sa.String),
+        sa.column('status', sa.String),
+        sa.column('type', sa.String),
+        sa.column('level', sa.String),
+        sa.column('award_date', sa.Date),
+    )
+    # 状态、类型、级别为非空的枚举列，不做 coalesce（PostgreSQL 会把 '' 转为枚举而报错）
+    dimensions = (
+        achievements.c.status,
+        achievements.c.type,
+        achievements.c.level,
+        sa.func.coalesce(sa.cast(sa.extract('year', achievements.c.award_date), sa.Integer), 0),
+    )
+    for scope, field in (('global', None), ('leader', 'leader_id'), ('submitter', 'submitter_id'), ('class', 'class_id')):
+        scope_id = sa.literal('') if field is None else achievements.c[field]
+        select = sa.select(
+            sa.literal(scope), scope_id, *dimensions, sa.func.count(achievements.c.achievement_id)
+        ).group_by(scope_id, *dimensions)
+        if field is not None:
+            select = select.where(achievements.c[field].isnot(None))
+        op.execute(stats.insert().from_select(KEY_COLUMNS + ['count'], select))
+
+
+def downgrade():
+    op.drop_table('achievement_stats')
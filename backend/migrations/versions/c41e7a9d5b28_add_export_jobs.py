@@ -0,0 +1,45 @@
+"""add export_jobs table
+
+新增后台导出任务表。
+
+Revision ID: c41e7a9d5b28
+Revises: 8b2d4e6f1a3c
+Create Date: 2026-10-18 14:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41e7a9d5b28'
+down_revision = '8b2d4e6f1a3c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'export_jobs',
+        sa.Column('job_id', sa.String(length=36), nullable=False),
+        sa.Column('created_by', sa.String(length=36), nullable=True),
+        sa.Column('format', sa.String(length=10), nullable=False),
+        sa.Column('filters', sa.JSON(), nullable=True),
+        sa.Column('status', sa.Enum('pending', 'running', 'done', 'failed', name='export_job_status'), nullable=False),
+        sa.Column('total_rows', sa.Integer(), nullable=True),
+        sa.Column('processed_rows', sa.Integer(), nullable=False),
+        sa.Column('file_name', sa.String(length=100), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['created_by'], ['users.user_id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('job_id')
+    )
+    op.create_index('ix_export_jobs_status_created', 'export_jobs', ['status', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_export_jobs_status_created', table_name='export_jobs')
+    op.drop_table('export_jobs')
+    sa.Enum(name='export_job_status').drop(op.get_bind(), checkfirst=True)
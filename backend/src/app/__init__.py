@@ -1,3 +1,4 @@
+import os
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -11,6 +12,9 @@ migrate = Migrate()
 jwt = JWTManager()
 ma = Marshmallow()
 
+# 迁移脚本目录（backend/migrations）
+MIGRATIONS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'migrations'))
+
 def create_app(config_name='default'):
     """应用工厂函数"""
     app = Flask(__name__)
@@ -18,10 +22,12 @@ def create_app(config_name='default'):
     # 加载配置
     from .config import config
     app.config.from_object(config[config_name])
+    # 后台任务子进程按配置名重建应用
+    app.config['CONFIG_NAME'] = config_name
     
     # 初始化扩展
     db.init_app(app)
-    migrate.init_app(app, db)
+    migrate.init_app(app, db, directory=MIGRATIONS_DIR)
     jwt.init_app(app)
     ma.init_app(app)
     
@@ -41,16 +47,13 @@ def create_app(config_name='default'):
     app.register_blueprint(upload_bp, url_prefix='/api')
     
     # 创建上传目录
-    import os
-    upload_dir = app.config['UPLOAD_FOLDER']
-    if not os.path.exists(upload_dir):
-        os.makedirs(upload_dir)
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
     # 添加静态文件服务
-    from flask import send_from_directory
+    from .utils.storage import serve_upload
     
-    @app.route('/uploads/<filename>')
+    @app.route('/uploads/<path:filename>')
     def uploaded_file(filename):
-        return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+        return serve_upload(filename)
     
     return app
\ No newline at end of file
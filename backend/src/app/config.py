@@ -18,11 +18,64 @@ class Config:
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-string'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+    # 访问令牌中的角色声明在签发后多少秒内直接信任，超过后回查用户状态（秒）
+    ROLE_CLAIMS_MAX_AGE = 300
+    # 回查得到的用户状态在进程内缓存的时间（秒）
+    USER_CACHE_TTL = 60
+    # 密码哈希方法与参数：werkzeug 格式（如 scrypt、scrypt:16384:8:1、pbkdf2:sha256:600000）或 bcrypt:<轮数>；
+    # 修改后旧哈希在用户下次登录时按新参数重算
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    # 同时计算哈希的线程数、排队（含计算中）上限与等待超时（秒），超出时登录返回 503。
+    # 已开始计算的哈希超时后仍会算完并占用线程与排队名额，超时应远大于单次哈希耗时；
+    # 排队上限不宜超过 线程数 × 超时 / 单次哈希耗时，否则排在末尾的请求注定超时
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 4))
+    PASSWORD_HASH_MAX_PENDING = 64
+    PASSWORD_HASH_TIMEOUT = 10
     
     # 文件上传配置
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'uploads')
     MAX_CONTENT_LENGTH = 50 * 1024 * 1024  # 50MB
     ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg'}
+    # 上传文件发送方式：python（应用发送，支持 Range/ETag）、x-accel（nginx）、x-sendfile（Apache/lighttpd）
+    UPLOAD_SERVE_MODE = os.environ.get('UPLOAD_SERVE_MODE', 'python')
+    USE_X_SENDFILE = UPLOAD_SERVE_MODE == 'x-sendfile'
+    # x-accel 模式下 nginx 中指向 UPLOAD_FOLDER 的 internal location
+    UPLOAD_ACCEL_PREFIX = os.environ.get('UPLOAD_ACCEL_PREFIX', '/protected-uploads/')
+    # 非内容寻址文件（旧版文件名）的缓存时间（秒）
+    UPLOAD_CACHE_MAX_AGE = 24 * 3600
+    # 断点续传：单个文件大小上限、建议分块大小（字节）与未完成会话的保留时间（秒）
+    RESUMABLE_UPLOAD_MAX_SIZE = 500 * 1024 * 1024
+    RESUMABLE_UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024
+    RESUMABLE_UPLOAD_EXPIRY = 24 * 3600
+    # 上传图片规范化（默认关闭）：原图大小上限、长边上限、输出格式（jpeg/webp）、编码质量、
+    # 是否保留规范化前的原图（保留时上传结果返回 original_file_path，保存成果时随 original_files 提交）
+    IMAGE_NORMALIZE = os.environ.get('IMAGE_NORMALIZE', 'false').lower() == 'true'
+    IMAGE_MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+    IMAGE_MAX_EDGE = 2560
+    IMAGE_NORMALIZE_FORMAT = os.environ.get('IMAGE_NORMALIZE_FORMAT', 'jpeg')
+    IMAGE_QUALITY = 82
+    IMAGE_KEEP_ORIGINAL = False
+    
+    # 缩略图：长边像素、生成进程数与排队上限
+    THUMBNAIL_SIZE = 320
+    THUMBNAIL_WORKERS = int(os.environ.get('THUMBNAIL_WORKERS', 2))
+    THUMBNAIL_MAX_PENDING = 64
+    
+    # 公开展示接口响应缓存（秒，0 表示关闭）
+    PUBLIC_CACHE_TTL = int(os.environ.get('PUBLIC_CACHE_TTL', 60))
+    PUBLIC_CACHE_MAX_ENTRIES = 512
+    # 检查共享缓存版本行的间隔（秒，0 表示每次读取缓存前都检查）：间隔内命中缓存不访问数据库，
+    # 其他进程的修改最迟在此间隔后生效，本进程的修改立即生效
+    PUBLIC_CACHE_CHECK_INTERVAL = int(os.environ.get('PUBLIC_CACHE_CHECK_INTERVAL', 2))
+    
+    # 后台导出任务：工作进程数、同时排队/执行的任务上限、结果保留时间与超时（秒）
+    EXPORT_JOB_WORKERS = int(os.environ.get('EXPORT_JOB_WORKERS', 2))
+    EXPORT_JOB_MAX_ACTIVE = 8
+    EXPORT_JOB_RETENTION = 24 * 3600
+    EXPORT_JOB_TIMEOUT = 3600
+    
+    # 系统配置快照检查版本号的间隔（秒）
+    SYSTEM_CONFIG_CHECK_INTERVAL = 5
     
     # CORS配置
     CORS_ORIGINS = ["http://localhost:8080", "http://127.0.0.1:8080", "http://121.194.211.93"]
@@ -46,6 +99,7 @@ class TestingConfig(Config):
     """测试环境配置"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    PUBLIC_CACHE_TTL = 0
 
 config = {
     'development': DevelopmentConfig,
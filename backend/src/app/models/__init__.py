@@ -1,6 +1,8 @@
 from .class_model import Class
 from .user import User
-from .achievement import Achievement
+from .achievement import Achievement, serialize_achievements
 from .audit_log import AuditLog
+from .achievement_stat import AchievementStat
+from .export_job import ExportJob
 
-__all__ = ['User', 'Class', 'Achievement', 'AuditLog']
\ No newline at end of file
+__all__ = ['User', 'Class', 'Achievement', 'AuditLog', 'AchievementStat', 'ExportJob', 'serialize_achievements']
\ No newline at end of file
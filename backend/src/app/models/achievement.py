@@ -1,12 +1,47 @@
 import uuid
 from datetime import datetime
 from app import db
-from app.models import User
+from app.models import User, Class
 from sqlalchemy.orm import Mapped
+from sqlalchemy.orm.attributes import set_committed_value
+from app.utils.storage import evidence_entries
+
+# 枚举值的显示名称
+TYPE_DISPLAY = {
+    'paper': '论文',
+    'competition': '竞赛',
+    'project': '项目',
+    'honor': '荣誉'
+}
+LEVEL_DISPLAY = {
+    'school': '校级',
+    'province': '省部级',
+    'national': '国家级'
+}
+STATUS_DISPLAY = {
+    'draft': '草稿',
+    'pending': '待审核',
+    'approved': '已通过',
+    'rejected': '已拒绝',
+    'returned': '已退回'
+}
 
 class Achievement(db.Model):
     """成果模型"""
     __tablename__ = 'achievements'
+    # 索引与各列表接口的过滤/排序方式对应，变更时同步 migrations/versions
+    __table_args__ = (
+        db.Index('ix_achievements_leader_status_created', 'leader_id', 'status', 'created_at'),
+        db.Index('ix_achievements_submitter_created', 'submitter_id', 'created_at'),
+        db.Index('ix_achievements_status_created', 'status', 'created_at'),
+        db.Index('ix_achievements_created', 'created_at'),
+        # 公开展示只查询已公开且已通过的成果，使用部分索引
+        db.Index(
+            'ix_achievements_public_award_date', 'award_date',
+            postgresql_where=db.text("is_public = true AND status = 'approved'"),
+            sqlite_where=db.text("is_public = 1 AND status = 'approved'")
+        ),
+    )
     
     achievement_id: Mapped[str] = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     title: Mapped[str] = db.Column(db.String(200), nullable=False)
@@ -33,6 +68,7 @@ class Achievement(db.Model):
         nullable=True  # 提交人
     )
     evidence_files: Mapped[list[str]] = db.Column(db.JSON, nullable=True)  # 佐证材料文件路径
+    original_files: Mapped[dict] = db.Column(db.JSON, nullable=True)  # 规范化前保留的原图：{佐证材料地址: 原图地址}
     status: Mapped[str] = db.Column(db.Enum('draft', 'pending', 'approved', 'rejected', 'returned', name='achievement_status'), 
                       default='draft', nullable=False)
     is_public: Mapped[bool] = db.Column(db.Boolean, default=False)  # 是否公开展示
@@ -55,35 +91,17 @@ class Achievement(db.Model):
     @property
     def type_display(self):
         """类型显示名称"""
-        type_map = {
-            'paper': '论文',
-            'competition': '竞赛',
-            'project': '项目',
-            'honor': '荣誉'
-        }
-        return type_map.get(self.type, self.type)
+        return TYPE_DISPLAY.get(self.type, self.type)
     
     @property
     def level_display(self):
         """级别显示名称"""
-        level_map = {
-            'school': '校级',
-            'province': '省部级',
-            'national': '国家级'
-        }
-        return level_map.get(self.level, self.level)
+        return LEVEL_DISPLAY.get(self.level, self.level)
     
     @property
     def status_display(self):
         """状态显示名称"""
-        status_map = {
-            'draft': '草稿',
-            'pending': '待审核',
-            'approved': '已通过',
-            'rejected': '已拒绝',
-            'returned': '已退回'
-        }
-        return status_map.get(self.status, self.status)
+        return STATUS_DISPLAY.get(self.status, self.status)
     
     def to_dict(self):
         """转换为字典格式"""
@@ -97,9 +115,11 @@ class Achievement(db.Model):
             'members': self.members if self.members else [],
             'class_id': self.class_id,
             'leader_id': self.leader_id,
-            'leader_name': leader.name if (leader:=User.query.get(self.leader_id)) else None,
+            'leader_name': self.leader.name if self.leader else None,
             'submitter_id': self.submitter_id,
             'evidence_files': self.evidence_files if self.evidence_files else [],
+            'original_files': self.original_files if self.original_files else {},
+            'evidence': evidence_entries(self.evidence_files, self.original_files),
             'status': self.status,
             'is_public': self.is_public,
             'description': self.description,
@@ -114,4 +134,30 @@ class Achievement(db.Model):
     def __repr__(self):
         return f'<Achievement {self.title}>'
 
+
+def preload_achievement_relations(achievements):
+    """批量加载成果关联的队长、提交人与班级
+
+    按 selectinload 的方式用 IN 查询一次性取回关联用户和班级，
+    再直接写入各成果的关系属性，逐行访问时不再触发懒加载查询。
+    """
+    user_ids = {a.leader_id for a in achievements} | {a.submitter_id for a in achievements}
+    user_ids.discard(None)
+    class_ids = {a.class_id for a in achievements if a.class_id}
+
+    users = {u.user_id: u for u in User.query.filter(User.user_id.in_(user_ids)).all()} if user_ids else {}
+    classes = {c.class_id: c for c in Class.query.filter(Class.class_id.in_(class_ids)).all()} if class_ids else {}
+
+    for achievement in achievements:
+        set_committed_value(achievement, 'leader', users.get(achievement.leader_id))
+        set_committed_value(achievement, 'submitter', users.get(achievement.submitter_id))
+        set_committed_value(achievement, 'class_info', classes.get(achievement.class_id))
+
+
+def serialize_achievements(achievements):
+    """批量序列化成果列表，关联数据最多两次查询"""
+    achievements = list(achievements)
+    preload_achievement_relations(achievements)
+    return [achievement.to_dict() for achievement in achievements]
+
 # AchievementSchema 移到单独的文件中以避免循环依赖
\ No newline at end of file
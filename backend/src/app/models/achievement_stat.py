@@ -0,0 +1,163 @@
+from collections import Counter
+from app import db
+from app.models.achievement import Achievement
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Mapped, Session
+
+# 汇总维度：全局、队长、提交人、班级
+STAT_SCOPES = (
+    ('global', None),
+    ('leader', 'leader_id'),
+    ('submitter', 'submitter_id'),
+    ('class', 'class_id'),
+)
+# 影响汇总计数的成果字段
+STAT_FIELDS = ('leader_id', 'submitter_id', 'class_id', 'status', 'type', 'level', 'award_date')
+KEY_COLUMNS = ('scope', 'scope_id', 'status', 'type', 'level', 'award_year')
+
+
+class AchievementStat(db.Model):
+    """成果统计汇总表
+
+    按 (维度, 维度ID, 状态, 类型, 级别, 获奖年份) 维护成果数量，
+    在成果新增、删除或关键字段变化的同一事务内增量更新。
+    """
+    __tablename__ = 'achievement_stats'
+
+    scope: Mapped[str] = db.Column(db.String(20), primary_key=True)  # global/leader/submitter/class
+    scope_id: Mapped[str] = db.Column(db.String(36), primary_key=True, default='')  # 全局维度为空串
+    status: Mapped[str] = db.Column(db.String(20), primary_key=True, default='')
+    type: Mapped[str] = db.Column(db.String(20), primary_key=True, default='')
+    level: Mapped[str] = db.Column(db.String(20), primary_key=True, default='')
+    award_year: Mapped[int] = db.Column(db.Integer, primary_key=True, default=0)  # 无获奖日期时为 0
+    count: Mapped[int] = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def keys_for(state):
+        """根据成果字段取值生成其所属的全部汇总键"""
+        award_date = state.get('award_date')
+        base = (
+            state.get('status') or '',
+            state.get('type') or '',
+            state.get('level') or '',
+            award_date.year if award_date else 0,
+        )
+        for scope, field in STAT_SCOPES:
+            if field is None:
+                yield (scope, '') + base
+            elif state.get(field):
+                yield (scope, state[field]) + base
+
+    @staticmethod
+    def apply_deltas(connection, deltas):
+        """把 {汇总键: 增量} 累加到汇总表（存在则累加，不存在则插入）"""
+        rows = [dict(zip(KEY_COLUMNS, key), count=delta) for key, delta in deltas.items() if delta]
+        if not rows:
+            return
+
+        table = AchievementStat.__table__
+        dialect = connection.dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            stmt = insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(KEY_COLUMNS),
+                set_={'count': table.c.count + stmt.excluded['count']}
+            )
+            connection.execute(stmt, rows)
+            return
+
+        # 其他数据库：先累加，未命中再插入
+        for row in rows:
+            result = connection.execute(
+                table.update()
+                .where(*(table.c[col] == row[col] for col in KEY_COLUMNS))
+                .values(count=table.c.count + row['count'])
+            )
+            if result.rowcount == 0:
+                connection.execute(table.insert().values(**row))
+
+    @staticmethod
+    def apply_states(connection, states, delta):
+        """按成果字段取值批量增减计数，states 为包含 STAT_FIELDS 的映射序列"""
+        deltas = Counter()
+        for state in states:
+            for key in AchievementStat.keys_for(state):
+                deltas[key] += delta
+        AchievementStat.apply_deltas(connection, deltas)
+
+    @staticmethod
+    def rebuild():
+        """按 achievements 表全量重算汇总表，用于修正计数偏差"""
+        table = AchievementStat.__table__
+        award_year = db.func.coalesce(
+            db.cast(db.extract('year', Achievement.award_date), db.Integer), 0
+        )
+        # 状态、类型、级别均为非空的枚举列，不能与 '' 做 coalesce（PostgreSQL 会把 '' 转为枚举而报错）
+        dimensions = (Achievement.status, Achievement.type, Achievement.level, award_year)
+
+        db.session.execute(table.delete())
+        for scope, field in STAT_SCOPES:
+            scope_id = db.literal('') if field is None else getattr(Achievement, field)
+            select = db.select(
+                db.literal(scope), scope_id, *dimensions, db.func.count(Achievement.achievement_id)
+            ).group_by(scope_id, *dimensions)
+            if field is not None:
+                select = select.where(getattr(Achievement, field).isnot(None))
+            db.session.execute(table.insert().from_select(list(KEY_COLUMNS) + ['count'], select))
+        db.session.commit()
+
+    def __repr__(self):
+        return f'<AchievementStat {self.scope}:{self.scope_id} {self.status}/{self.type}/{self.level}/{self.award_year}={self.count}>'
+
+
+def _stat_state(achievement, use_old):
+    """取成果在本次 flush 前（use_old）或之后的字段取值"""
+    attrs = inspect(achievement).attrs
+    state = {}
+    for field in STAT_FIELDS:
+        history = attrs[field].history
+        if use_old:
+            values = history.deleted or history.unchanged or history.added
+        else:
+            values = history.added or history.unchanged
+        state[field] = values[0] if values else None
+    return state
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    """仅用于开启 active_history，不修改赋值"""
+
+
+# 对象提交后属性会过期，赋值时默认不加载旧值；开启 active_history 使 flush 时能取到旧值
+for _field in STAT_FIELDS:
+    event.listen(getattr(Achievement, _field), 'set', _keep_old_value, active_history=True)
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_achievement_stats(session, flush_context):
+    """在同一事务中根据成果的新增、删除与字段变化维护汇总计数"""
+    deltas = Counter()
+
+    def add(state, delta):
+        for key in AchievementStat.keys_for(state):
+            deltas[key] += delta
+
+    for obj in session.new:
+        if isinstance(obj, Achievement):
+            add(_stat_state(obj, use_old=False), 1)
+    for obj in session.deleted:
+        if isinstance(obj, Achievement):
+            add(_stat_state(obj, use_old=True), -1)
+    for obj in session.dirty:
+        if isinstance(obj, Achievement):
+            attrs = inspect(obj).attrs
+            if any(attrs[field].history.has_changes() for field in STAT_FIELDS):
+                add(_stat_state(obj, use_old=True), -1)
+                add(_stat_state(obj, use_old=False), 1)
+
+    if deltas:
+        AchievementStat.apply_deltas(session.connection(), deltas)
@@ -2,11 +2,16 @@ import uuid
 from datetime import datetime
 from app import db
 from app.models import User
+from app.models.achievement import Achievement
 from sqlalchemy.orm import Mapped
 
 class AuditLog(db.Model):
     """审核日志模型"""
     __tablename__ = 'logs'
+    __table_args__ = (
+        db.Index('ix_logs_achievement_time', 'achievement_id', 'audit_time'),
+        db.Index('ix_logs_auditor_time', 'auditor_id', 'audit_time'),
+    )
     
     log_id: Mapped[str] = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     # 关联到成果：删除成果时级联删除对应审核日志
@@ -25,13 +30,15 @@ class AuditLog(db.Model):
     comment: Mapped[str] = db.Column(db.Text, nullable=True)  # 审核意见
     audit_time: Mapped[datetime] = db.Column(db.DateTime, default=datetime.now, nullable=False)
     
-    def to_dict(self):
-        """转换为字典"""
+    def to_dict(self, auditor_name=None):
+        """转换为字典，auditor_name 已由联表查询取得时可直接传入"""
+        if auditor_name is None and self.auditor is not None:
+            auditor_name = self.auditor.name
         return {
             'log_id': self.log_id,
             'achievement_id': self.achievement_id,
             'auditor_id': self.auditor_id,
-            'auditor_name': auditor.name if (auditor:=User.query.get(self.auditor_id)) else None,
+            'auditor_name': auditor_name,
             'action': self.action,
             'action_display': self.action_display,
             'comment': self.comment,
@@ -48,6 +55,57 @@ class AuditLog(db.Model):
         }
         return action_map.get(self.action, self.action)
     
+    @staticmethod
+    def listing_query():
+        """审核记录列表查询：一次联表同时取出审核人姓名与成果标题
+
+        返回的每行为 (AuditLog, auditor_name, achievement_title)。
+        """
+        return db.session.query(
+            AuditLog,
+            User.name.label('auditor_name'),
+            Achievement.title.label('achievement_title')
+        ).outerjoin(User, User.user_id == AuditLog.auditor_id)\
+         .outerjoin(Achievement, Achievement.achievement_id == AuditLog.achievement_id)
+
+    @staticmethod
+    def latest_per_achievement(achievement_ids=None):
+        """每个成果最新一条审核记录的子查询
+
+        以 achievement_id 分区、按 audit_time 倒序编号，只保留第一行。
+        achievement_ids 可传入 id 列表或 select 子查询，把窗口函数的计算范围
+        限制在当前页面涉及的成果上。
+        """
+        ranked = db.session.query(
+            AuditLog.achievement_id,
+            AuditLog.action,
+            AuditLog.comment,
+            AuditLog.audit_time,
+            db.func.row_number().over(
+                partition_by=AuditLog.achievement_id,
+                order_by=(AuditLog.audit_time.desc(), AuditLog.log_id.desc())
+            ).label('row_num')
+        )
+        if achievement_ids is not None:
+            ranked = ranked.filter(AuditLog.achievement_id.in_(achievement_ids))
+        ranked = ranked.subquery()
+        return db.session.query(
+            ranked.c.achievement_id,
+            ranked.c.action,
+            ranked.c.comment,
+            ranked.c.audit_time
+        ).filter(ranked.c.row_num == 1).subquery('latest_audit')
+
     def __repr__(self):
-        return f'<AuditLog {self.action} by \
-            {auditor.name if (auditor:=User.query.get(self.auditor_id)) else "Unknown"}>'
+        return f'<AuditLog {self.action} by {self.auditor_id or "Unknown"}>'
+
+
+def serialize_audit_log_rows(rows):
+    """序列化 AuditLog.listing_query() 的查询结果"""
+    return [
+        {
+            **log.to_dict(auditor_name=auditor_name),
+            'achievement_title': achievement_title if achievement_title is not None else '已删除的成果'
+        }
+        for log, auditor_name, achievement_title in rows
+    ]
@@ -0,0 +1,58 @@
+import uuid
+from datetime import datetime
+from app import db
+from sqlalchemy.orm import Mapped
+
+class ExportJob(db.Model):
+    """后台导出任务模型"""
+    __tablename__ = 'export_jobs'
+    __table_args__ = (
+        db.Index('ix_export_jobs_status_created', 'status', 'created_at'),
+    )
+    
+    job_id: Mapped[str] = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    # 关联到发起人：删除用户时置空
+    created_by: Mapped[str] = db.Column(
+        db.String(36),
+        db.ForeignKey('users.user_id', ondelete='SET NULL'),
+        nullable=True
+    )
+    format: Mapped[str] = db.Column(db.String(10), nullable=False)  # xlsx/csv/ndjson
+    filters: Mapped[dict] = db.Column(db.JSON, nullable=True)  # 导出过滤条件
+    status: Mapped[str] = db.Column(db.Enum('pending', 'running', 'done', 'failed', name='export_job_status'),
+                      default='pending', nullable=False)
+    total_rows: Mapped[int] = db.Column(db.Integer, nullable=True)  # 开始执行后计算
+    processed_rows: Mapped[int] = db.Column(db.Integer, default=0, nullable=False)
+    file_name: Mapped[str] = db.Column(db.String(100), nullable=True)  # 导出目录下的文件名
+    error: Mapped[str] = db.Column(db.Text, nullable=True)
+    created_at: Mapped[datetime] = db.Column(db.DateTime, default=datetime.now)
+    started_at: Mapped[datetime] = db.Column(db.DateTime, nullable=True)
+    finished_at: Mapped[datetime] = db.Column(db.DateTime, nullable=True)
+    
+    @property
+    def progress(self):
+        """完成百分比"""
+        if self.status == 'done':
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, int(self.processed_rows * 100 / self.total_rows))
+    
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'job_id': self.job_id,
+            'format': self.format,
+            'filters': self.filters or {},
+            'status': self.status,
+            'total_rows': self.total_rows,
+            'processed_rows': self.processed_rows,
+            'progress': self.progress,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<ExportJob {self.job_id} {self.status}>'
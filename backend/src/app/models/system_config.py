@@ -1,8 +1,21 @@
 from app import db
 from datetime import datetime
 import json
+import threading
+import time
+import uuid
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Mapped
 
+# 版本行：每次修改配置时改写为新的随机值，各进程据此判断内存快照是否过期
+VERSION_KEY = '__config_version__'
+# 以 __ 开头的键为内部版本行，不属于系统配置
+INTERNAL_PREFIX = '__'
+
+_snapshot_lock = threading.Lock()
+_snapshot = {'version': None, 'values': {}, 'checked_at': 0.0}
+
 class SystemConfig(db.Model):
     """系统配置模型"""
     __tablename__ = 'system_configs'
@@ -42,13 +55,96 @@ class SystemConfig(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
     
+    @staticmethod
+    def get_snapshot():
+        """获取内存中的配置快照
+
+        每隔 SYSTEM_CONFIG_CHECK_INTERVAL 秒检查一次版本行，版本变化时才重新加载全部配置。
+        版本行不存在时（如未经 run/init_db 启动的 WSGI 部署）先补充默认配置与版本行。
+        """
+        interval = current_app.config.get('SYSTEM_CONFIG_CHECK_INTERVAL', 0)
+        now = time.monotonic()
+        with _snapshot_lock:
+            if _snapshot['version'] is not None and now - _snapshot['checked_at'] < interval:
+                return _snapshot['values']
+
+        version = SystemConfig.read_stamp(VERSION_KEY)
+        if version is None:
+            SystemConfig._seed_defaults()
+            version = SystemConfig.read_stamp(VERSION_KEY)
+        with _snapshot_lock:
+            if version == _snapshot['version']:
+                _snapshot['checked_at'] = now
+                return _snapshot['values']
+
+        values = {
+            config.config_key: config.get_value()
+            for config in SystemConfig.query.filter(
+                db.not_(SystemConfig.config_key.startswith(INTERNAL_PREFIX, autoescape=True))
+            ).all()
+        }
+        with _snapshot_lock:
+            _snapshot.update(version=version, values=values, checked_at=now)
+        return values
+
+    @staticmethod
+    def _seed_defaults():
+        """补充缺失的默认配置与版本行，多个进程同时补充时以先提交的为准"""
+        try:
+            SystemConfig.init_default_configs()
+        except IntegrityError:
+            db.session.rollback()
+
+    @staticmethod
+    def invalidate_snapshot():
+        """丢弃本进程的配置快照，下次读取时重新加载"""
+        with _snapshot_lock:
+            _snapshot.update(version=None, values={}, checked_at=0.0)
+
+    @staticmethod
+    def _bump_version():
+        """把版本行改写为新的随机值（随当前事务提交）"""
+        value = uuid.uuid4().hex
+        if not SystemConfig._update_stamp(VERSION_KEY, value):
+            db.session.add(SystemConfig(VERSION_KEY, value, '配置版本号'))
+
+    @staticmethod
+    def _update_stamp(key, value):
+        """以单条 UPDATE 改写内部版本行，返回版本行是否存在"""
+        table = SystemConfig.__table__
+        update = table.update().where(table.c.config_key == key)\
+            .values(config_value=value, updated_at=datetime.now())
+        return db.session.execute(update).rowcount > 0
+
+    @staticmethod
+    def read_stamp(key):
+        """读取内部版本行的值，不存在时返回 None"""
+        return db.session.query(SystemConfig.config_value)\
+            .filter(SystemConfig.config_key == key).scalar()
+
+    @staticmethod
+    def write_stamp(key, description):
+        """把内部版本行改写为新的随机值并提交，返回新值
+
+        其他进程读到与自己记录不同的值，即知对应的数据已变化。
+        """
+        value = uuid.uuid4().hex
+        if not SystemConfig._update_stamp(key, value):
+            try:
+                db.session.add(SystemConfig(key, value, description))
+                db.session.commit()
+                return value
+            except IntegrityError:
+                # 其他进程同时插入了版本行，改为更新
+                db.session.rollback()
+                SystemConfig._update_stamp(key, value)
+        db.session.commit()
+        return value
+
     @staticmethod
     def get_config(key, default_value=None):
-        """获取配置"""
-        config = SystemConfig.query.filter_by(config_key=key).first()
-        if config:
-            return config.get_value()
-        return default_value
+        """获取配置（读取内存快照）"""
+        return SystemConfig.get_snapshot().get(key, default_value)
     
     @staticmethod
     def set_config(key, value, description=None):
@@ -59,21 +155,19 @@ class SystemConfig(db.Model):
         else:
             config = SystemConfig(key, value, description)
             db.session.add(config)
+        SystemConfig._bump_version()
         db.session.commit()
+        SystemConfig.invalidate_snapshot()
         return config
     
     @staticmethod
     def get_all_configs():
         """获取所有配置"""
-        configs = SystemConfig.query.all()
-        result = {}
-        for config in configs:
-            result[config.config_key] = config.get_value()
-        return result
+        return dict(SystemConfig.get_snapshot())
     
     @staticmethod
     def init_default_configs():
-        """初始化默认配置"""
+        """初始化默认配置（启动、初始化数据库或首次读取配置时调用，只补充缺失的配置项与版本行）"""
         default_configs = {
             'system_name': {
                 'value': '学生成果登记与管理系统',
@@ -106,10 +200,17 @@ class SystemConfig(db.Model):
             }
         }
         
-        for key, config_data in default_configs.items():
-            existing = SystemConfig.query.filter_by(config_key=key).first()
-            if not existing:
-                SystemConfig.set_config(key, config_data['value'], config_data['description'])
+        existing = {key for (key,) in db.session.query(SystemConfig.config_key).all()}
+        missing = [key for key in default_configs if key not in existing]
+        if not missing and VERSION_KEY in existing:
+            return
+        
+        for key in missing:
+            config_data = default_configs[key]
+            db.session.add(SystemConfig(key, config_data['value'], config_data['description']))
+        SystemConfig._bump_version()
+        db.session.commit()
+        SystemConfig.invalidate_snapshot()
     
     def __repr__(self):
         return f'<SystemConfig {self.config_key}>'
\ No newline at end of file
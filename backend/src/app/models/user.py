@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 from app import db
+from app.utils.passwords import hash_password, verify_password
 from sqlalchemy.orm import Mapped
 
 class User(db.Model):
@@ -19,7 +19,7 @@ class User(db.Model):
         db.ForeignKey('classes.class_id', ondelete='SET NULL'),
         nullable=True
     )
-    created_at: Mapped[datetime] = db.Column(db.DateTime, default=datetime.now)
+    created_at: Mapped[datetime] = db.Column(db.DateTime, default=datetime.now, index=True)
     is_active: Mapped[bool] = db.Column(db.Boolean, default=True)
 
     # 关系
@@ -30,11 +30,11 @@ class User(db.Model):
     
     def set_password(self, password):
         """设置密码哈希"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
         """验证密码"""
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
     
     def to_dict(self):
         """转换为字典"""
@@ -1,23 +1,38 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, current_app, send_from_directory, url_for
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy.exc import IntegrityError
 from ..models.user import User
-from ..models.achievement import Achievement
+from ..models.achievement import Achievement, serialize_achievements
 from ..models.class_model import Class
+from ..models.export_job import ExportJob
+from ..models.system_config import SystemConfig
+from ..utils.pagination import keyset_paginate, InvalidCursor
+from ..utils.statistics import achievement_counts, user_counts
+from ..utils.cache import public_cache
+from ..utils.auth import role_required, invalidate_user
+from ..utils.passwords import password_hasher, hash_password
+from ..utils.roster import (
+    ROSTER_FORMATS, RosterError, iter_students, validate_students, class_data, ensure_classes, insert_users
+)
+from ..utils.bulk import (
+    ADMIN_OPERATIONS, BulkOperationError, operation_values, bulk_update_achievements, detach_achievements
+)
+from ..utils.export import (
+    EXPORT_FORMATS, export_filters, export_response, export_dir, export_filename,
+    submit_export_job, active_export_jobs, cleanup_export_jobs
+)
 from .. import db
 
 admin_bp = Blueprint('admin', __name__)
 
+# 游标分页允许的排序列（均有索引）
+USER_KEYSET_SORTS = {'created_at': User.created_at, 'username': User.username}
+
 @admin_bp.route('/users', methods=['GET'])
-@jwt_required()
+@role_required('admin')
 def get_users():
     """获取用户列表"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'admin':
-            return jsonify({'message': '权限不足'}), 403
-        
         # 获取查询参数
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
@@ -42,20 +57,33 @@ def get_users():
                 )
             )
         
-        # 排序
-        if sort_order == 'desc':
-            query = query.order_by(getattr(User, sort_by).desc())
+        cursor = request.args.get('cursor')
+        if cursor is not None:
+            # 游标分页：按 (排序列, 主键) 定位，不计算总数
+            if sort_by not in USER_KEYSET_SORTS:
+                return jsonify({'message': '游标分页不支持该排序字段'}), 400
+            items, next_cursor, prev_cursor = keyset_paginate(
+                query, USER_KEYSET_SORTS[sort_by], User.user_id, cursor, per_page,
+                descending=sort_order == 'desc'
+            )
+            pagination = {'next_cursor': next_cursor, 'prev_cursor': prev_cursor, 'per_page': per_page}
         else:
-            query = query.order_by(getattr(User, sort_by))
-        
-        # 分页查询
-        users = query.paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+            # 排序
+            if sort_order == 'desc':
+                query = query.order_by(getattr(User, sort_by).desc())
+            else:
+                query = query.order_by(getattr(User, sort_by))
+            
+            # 分页查询
+            users = query.paginate(
+                page=page, per_page=per_page, error_out=False
+            )
+            items = users.items
+            pagination = {'total': users.total, 'pages': users.pages, 'current_page': page}
         
         # 获取用户信息（包含班级名称）
         user_list = []
-        for user_item in users.items:
+        for user_item in items:
             user_dict = user_item.to_dict()
             if user_item.class_id:
                 class_info = Class.query.get(user_item.class_id)
@@ -64,27 +92,18 @@ def get_users():
                 user_dict['class_name'] = '无'
             user_list.append(user_dict)
         
-        return jsonify({
-            'users': user_list,
-            'total': users.total,
-            'pages': users.pages,
-            'current_page': page
-        }), 200
+        return jsonify({'users': user_list, **pagination}), 200
         
+    except InvalidCursor:
+        return jsonify({'message': '分页游标无效'}), 400
     except Exception as e:
         return jsonify({'message': f'获取用户列表失败: {str(e)}'}), 500
 
 @admin_bp.route('/users/<user_id>', methods=['PUT'])
-@jwt_required()
+@role_required('admin')
 def update_user(user_id):
     """更新用户信息"""
     try:
-        current_user_id = get_jwt_identity()
-        admin_user = User.query.get(current_user_id)
-        
-        if not admin_user or admin_user.role != 'admin':
-            return jsonify({'message': '权限不足'}), 403
-        
         user = User.query.get(user_id)
         if not user:
             return jsonify({'message': '用户不存在'}), 404
@@ -102,6 +121,7 @@ def update_user(user_id):
             user.is_active = data['is_active']
         
         db.session.commit()
+        invalidate_user(user_id)
         
         return jsonify({
             'message': '用户信息更新成功',
@@ -113,16 +133,10 @@ def update_user(user_id):
         return jsonify({'message': f'更新用户信息失败: {str(e)}'}), 500
 
 @admin_bp.route('/classes', methods=['GET'])
-@jwt_required()
+@role_required('admin')
 def get_classes():
     """获取班级列表"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'admin':
-            return jsonify({'message': '权限不足'}), 403
-        
         classes = Class.query.all()
         return jsonify({
             'classes': [cls.to_dict() for cls in classes]
@@ -132,16 +146,10 @@ def get_classes():
         return jsonify({'message': f'获取班级列表失败: {str(e)}'}), 500
 
 @admin_bp.route('/classes', methods=['POST'])
-@jwt_required()
+@role_required('admin')
 def create_class():
     """创建班级"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'admin':
-            return jsonify({'message': '权限不足'}), 403
-        
         data = request.get_json()
         
         # 验证必填字段
@@ -169,16 +177,10 @@ def create_class():
         return jsonify({'message': f'创建班级失败: {str(e)}'}), 500
 
 @admin_bp.route('/classes/<class_id>', methods=['PUT'])
-@jwt_required()
+@role_required('admin')
 def update_class(class_id):
     """更新班级信息"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'admin':
-            return jsonify({'message': '权限不足'}), 403
-        
         cls = Class.query.get(class_id)
         if not cls:
             return jsonify({'message': '班级不存在'}), 404
@@ -192,6 +194,8 @@ def update_class(class_id):
             cls.college = data['college']
         
         db.session.commit()
+        # 班级名称与学院出现在公开成果列表与按班级统计中
+        public_cache.invalidate()
         
         return jsonify({
             'message': '班级更新成功',
@@ -203,16 +207,10 @@ def update_class(class_id):
         return jsonify({'message': f'更新班级失败: {str(e)}'}), 500
 
 @admin_bp.route('/classes/<class_id>', methods=['DELETE'])
-@jwt_required()
+@role_required('admin')
 def delete_class(class_id):
     """删除班级"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'admin':
-            return jsonify({'message': '权限不足'}), 403
-        
         cls = Class.query.get(class_id)
         if not cls:
             return jsonify({'message': '班级不存在'}), 404
@@ -222,8 +220,11 @@ def delete_class(class_id):
         if user_count > 0:
             return jsonify({'message': f'该班级还有 {user_count} 个用户，无法删除'}), 400
         
+        # 先置空成果中的班级并同步统计汇总表，不依赖数据库的 SET NULL
+        detach_achievements(('class_id',), class_id)
         db.session.delete(cls)
         db.session.commit()
+        public_cache.invalidate()
         
         return jsonify({'message': '班级删除成功'}), 200
         
@@ -232,16 +233,10 @@ def delete_class(class_id):
         return jsonify({'message': f'删除班级失败: {str(e)}'}), 500
 
 @admin_bp.route('/achievements', methods=['GET'])
-@jwt_required()
+@role_required('admin')
 def get_all_achievements():
     """获取所有成果"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'admin':
-            return jsonify({'message': '权限不足'}), 403
-        
         # 获取查询参数
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
@@ -259,32 +254,32 @@ def get_all_achievements():
         if level:
             query = query.filter_by(level=level)
         
-        # 分页查询
-        achievements = query.order_by(Achievement.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        cursor = request.args.get('cursor')
+        if cursor is not None:
+            items, next_cursor, prev_cursor = keyset_paginate(
+                query, Achievement.created_at, Achievement.achievement_id, cursor, per_page
+            )
+            pagination = {'next_cursor': next_cursor, 'prev_cursor': prev_cursor, 'per_page': per_page}
+        else:
+            # 分页查询
+            achievements = query.order_by(Achievement.created_at.desc()).paginate(
+                page=page, per_page=per_page, error_out=False
+            )
+            items = achievements.items
+            pagination = {'total': achievements.total, 'pages': achievements.pages, 'current_page': page}
         
-        return jsonify({
-            'achievements': [achievement.to_dict() for achievement in achievements.items],
-            'total': achievements.total,
-            'pages': achievements.pages,
-            'current_page': page
-        }), 200
+        return jsonify({'achievements': serialize_achievements(items), **pagination}), 200
         
+    except InvalidCursor:
+        return jsonify({'message': '分页游标无效'}), 400
     except Exception as e:
         return jsonify({'message': f'获取成果列表失败: {str(e)}'}), 500
 
 @admin_bp.route('/achievements/<achievement_id>/public', methods=['PUT'])
-@jwt_required()
+@role_required('admin')
 def update_achievement_public(achievement_id):
     """更新成果公开状态"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'admin':
-            return jsonify({'message': '权限不足'}), 403
-        
         achievement = Achievement.query.get(achievement_id)
         if not achievement:
             return jsonify({'message': '成果不存在'}), 404
@@ -293,6 +288,7 @@ def update_achievement_public(achievement_id):
         achievement.is_public = data.get('is_public', False)
         
         db.session.commit()
+        public_cache.invalidate()
         
         return jsonify({'message': '公开状态更新成功'}), 200
         
@@ -301,73 +297,137 @@ def update_achievement_public(achievement_id):
         return jsonify({'message': f'更新失败: {str(e)}'}), 500
 
 @admin_bp.route('/achievements/batch', methods=['POST'])
-@jwt_required()
+@role_required('admin')
 def batch_operate_achievements():
-    """批量操作成果"""
+    """批量操作成果（set_public/set_private/set_status/set_class）"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'admin':
-            return jsonify({'message': '权限不足'}), 403
-        
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'message': '请求体必须是 JSON 对象'}), 400
         achievement_ids = data.get('achievement_ids', [])
         operation = data.get('operation')
         value = data.get('value', True)
         
+        if not isinstance(achievement_ids, list) or not all(isinstance(item, str) for item in achievement_ids):
+            return jsonify({'message': 'achievement_ids 必须是成果 ID 数组'}), 400
         if not achievement_ids:
             return jsonify({'message': '请选择要操作的成果'}), 400
         
-        # 获取成果
-        achievements = Achievement.query.filter(
-            Achievement.achievement_id.in_(achievement_ids)
-        ).all()
+        if operation not in ADMIN_OPERATIONS:
+            return jsonify({'message': '无效的操作类型'}), 400
         
-        # 执行批量操作
-        for achievement in achievements:
-            if operation == 'set_public':
-                achievement.is_public = value
+        # 单条（分块）UPDATE 完成批量操作
+        affected = bulk_update_achievements(achievement_ids, operation_values(operation, value))
         
         db.session.commit()
+        public_cache.invalidate()
         
         return jsonify({
-            'message': f'批量操作成功，共处理 {len(achievements)} 个成果'
+            'message': f'批量操作成功，共处理 {affected} 个成果',
+            'affected': affected
         }), 200
         
+    except BulkOperationError as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': f'批量操作失败: {str(e)}'}), 500
 
 @admin_bp.route('/export', methods=['GET'])
-@jwt_required()
+@role_required('admin')
 def export_data():
-    """导出数据"""
+    """导出成果数据（format=xlsx|csv|ndjson），支持与成果列表相同的过滤条件"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        fmt = request.args.get('format', 'xlsx')
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({'message': '不支持的导出格式'}), 400
         
-        if not user or user.role != 'admin':
-            return jsonify({'message': '权限不足'}), 403
-        
-        # 这里可以实现Excel导出功能
-        # 暂时返回成功消息
-        return jsonify({'message': '导出功能开发中'}), 200
+        return export_response(export_filters(request.args), fmt)
         
     except Exception as e:
         return jsonify({'message': f'导出失败: {str(e)}'}), 500
 
+def _export_job_dict(job):
+    """任务状态，完成后附带下载地址"""
+    result = job.to_dict()
+    if job.status == 'done':
+        result['download_url'] = url_for('admin.download_export_job', job_id=job.job_id)
+    return result
+
+@admin_bp.route('/export-jobs', methods=['POST'])
+@role_required('admin')
+def create_export_job():
+    """创建后台导出任务"""
+    try:
+        data = request.get_json(silent=True)
+        if data is None:
+            data = {}
+        if not isinstance(data, dict):
+            return jsonify({'message': '请求体必须是 JSON 对象'}), 400
+        fmt = data.get('format', 'xlsx')
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({'message': '不支持的导出格式'}), 400
+        filters = data.get('filters') or {}
+        if not isinstance(filters, dict) or not all(isinstance(value, str) for value in filters.values()):
+            return jsonify({'message': 'filters 必须是以字符串为值的对象'}), 400
+        
+        cleanup_export_jobs()
+        if active_export_jobs() >= current_app.config['EXPORT_JOB_MAX_ACTIVE']:
+            return jsonify({'message': '导出任务过多，请稍后再试'}), 429
+        
+        job = ExportJob(
+            created_by=get_jwt_identity(),
+            format=fmt,
+            filters=export_filters(filters)
+        )
+        db.session.add(job)
+        db.session.commit()
+        
+        try:
+            submit_export_job(job.job_id)
+        except Exception as e:
+            job.status = 'failed'
+            job.error = f'提交任务失败: {str(e)}'
+            db.session.commit()
+        
+        return jsonify({'message': '导出任务已创建', 'job': _export_job_dict(job)}), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': f'创建导出任务失败: {str(e)}'}), 500
+
+@admin_bp.route('/export-jobs/<job_id>', methods=['GET'])
+@role_required('admin')
+def get_export_job(job_id):
+    """查询导出任务进度"""
+    job = db.session.get(ExportJob, job_id)
+    if not job:
+        return jsonify({'message': '导出任务不存在'}), 404
+    
+    return jsonify({'job': _export_job_dict(job)}), 200
+
+@admin_bp.route('/export-jobs/<job_id>/download', methods=['GET'])
+@role_required('admin')
+def download_export_job(job_id):
+    """下载已完成的导出文件"""
+    job = db.session.get(ExportJob, job_id)
+    if not job:
+        return jsonify({'message': '导出任务不存在'}), 404
+    if job.status != 'done' or not job.file_name:
+        return jsonify({'message': '导出任务尚未完成'}), 409
+    
+    return send_from_directory(
+        export_dir(), job.file_name,
+        as_attachment=True,
+        download_name=export_filename('achievements', job.format)
+    )
+
 @admin_bp.route('/config', methods=['GET'])
-@jwt_required()
+@role_required()
 def get_system_config():
     """获取系统配置"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user:
-            return jsonify({'message': '用户不存在'}), 404
-        
         # 返回默认系统配置
         config = {
             'system_name': '学生成果登记与管理系统',
@@ -392,16 +452,10 @@ def get_system_config():
         return jsonify({'message': f'获取系统配置失败: {str(e)}'}), 500
 
 @admin_bp.route('/config', methods=['PUT'])
-@jwt_required()
+@role_required('admin')
 def update_system_config():
     """更新系统配置"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'admin':
-            return jsonify({'message': '权限不足'}), 403
-        
         data = request.get_json()
         
         # 这里可以将配置保存到数据库或配置文件
@@ -412,54 +466,33 @@ def update_system_config():
         return jsonify({'message': f'保存系统配置失败: {str(e)}'}), 500
 
 @admin_bp.route('/statistics/overview', methods=['GET'])
-@jwt_required()
+@role_required('admin')
 def get_overview_statistics():
     """获取系统概览统计"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'admin':
-            return jsonify({'message': '权限不足'}), 403
-        
-        stats = {}
-        
-        # 用户统计
-        stats['users'] = {
-            'total': User.query.count(),
-            'students': User.query.filter_by(role='student').count(),
-            'leaders': User.query.filter_by(role='team_leader').count(),
-            'admins': User.query.filter_by(role='admin').count()
-        }
-        
-        # 成果统计
-        stats['achievements'] = {
-            'total': Achievement.query.count(),
-            'pending': Achievement.query.filter_by(status='pending').count(),
-            'approved': Achievement.query.filter_by(status='approved').count(),
-            'returned': Achievement.query.filter_by(status='returned').count(),
-            'rejected': Achievement.query.filter_by(status='rejected').count()
-        }
-        
-        # 按类型统计成果
-        type_stats = db.session.query(
-            Achievement.type,
-            db.func.count(Achievement.achievement_id).label('count')
-        ).group_by(Achievement.type).all()
-        
-        stats['achievements']['by_type'] = {type_name: count for type_name, count in type_stats}
-        
-        # 按级别统计成果
-        level_stats = db.session.query(
-            Achievement.level,
-            db.func.count(Achievement.achievement_id).label('count')
-        ).group_by(Achievement.level).all()
-        
-        stats['achievements']['by_level'] = {level_name: count for level_name, count in level_stats}
-        
-        # 班级统计
-        stats['classes'] = {
-            'total': Class.query.count()
+        # 用户一条聚合查询，成果数量读取统计汇总表
+        users = user_counts()
+        achievements = achievement_counts()
+        
+        stats = {
+            'users': {
+                'total': users['total'],
+                'students': users['by_role'].get('student', 0),
+                'leaders': users['by_role'].get('team_leader', 0),
+                'admins': users['by_role'].get('admin', 0)
+            },
+            'achievements': {
+                'total': achievements['total'],
+                'pending': achievements['by_status'].get('pending', 0),
+                'approved': achievements['by_status'].get('approved', 0),
+                'returned': achievements['by_status'].get('returned', 0),
+                'rejected': achievements['by_status'].get('rejected', 0),
+                'by_type': achievements['by_type'],
+                'by_level': achievements['by_level']
+            },
+            'classes': {
+                'total': users['classes']
+            }
         }
         
         return jsonify({'statistics': stats}), 200
@@ -468,16 +501,10 @@ def get_overview_statistics():
         return jsonify({'message': f'获取统计数据失败: {str(e)}'}), 500
 
 @admin_bp.route('/users', methods=['POST'])
-@jwt_required()
+@role_required('admin')
 def create_user():
     """创建用户"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'admin':
-            return jsonify({'message': '权限不足'}), 403
-        
         data = request.get_json()
         
         # 验证必填字段
@@ -513,17 +540,70 @@ def create_user():
         db.session.rollback()
         return jsonify({'message': f'创建用户失败: {str(e)}'}), 500
 
+@admin_bp.route('/users/import', methods=['POST'])
+@role_required('admin')
+def import_users():
+    """批量导入学生账号（xlsx 或 CSV，格式同 init_db 的《学生.xlsx》）
+
+    参数：dry_run=1 只校验不写入；create_classes=1 自动创建不存在的班级。
+    合法行分批插入，不合法的行在 errors 中逐行说明原因；新账号使用系统默认密码。
+    """
+    try:
+        file = request.files.get('file')
+        if file is None or not file.filename:
+            return jsonify({'message': '没有选择文件'}), 400
+
+        file_format = file.filename.rsplit('.', 1)[-1].lower()
+        if file_format not in ROSTER_FORMATS:
+            return jsonify({'message': '仅支持 xlsx 或 csv 文件'}), 400
+
+        dry_run = request.form.get('dry_run', request.args.get('dry_run')) in ('1', 'true')
+        create_classes = request.form.get('create_classes', request.args.get('create_classes')) in ('1', 'true')
+
+        # 逐行读取文件，用户名与班级各用集合查询一次性校验
+        students, missing_classes, errors = validate_students(
+            iter_students(file.stream, file_format), create_classes
+        )
+
+        if not dry_run and students:
+            # 校验通过的班级均已存在或允许新建，一次查询取回 class_id 并补建缺失的班级
+            name_to_id, _ = ensure_classes({class_data(s)['class_name']: class_data(s) for s in students})
+            # 所有新账号使用同一个默认密码，哈希只计算一次
+            password_hash = hash_password(SystemConfig.get_config('default_password', 'student123'))
+            insert_users([
+                {
+                    'username': s['username'],
+                    'name': s['name'],
+                    'role': 'student',
+                    'password_hash': password_hash,
+                    'class_id': name_to_id[class_data(s)['class_name']],
+                }
+                for s in students
+            ])
+            db.session.commit()
+
+        return jsonify({
+            'message': f"{'校验完成' if dry_run else '导入完成'}，可导入 {len(students)} 个，错误 {len(errors)} 行",
+            'dry_run': dry_run,
+            'imported': 0 if dry_run else len(students),
+            'created_classes': sorted(missing_classes),
+            'errors': errors
+        }), 200
+
+    except RosterError as e:
+        return jsonify({'message': str(e)}), 400
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'message': '导入期间部分用户名已被占用，请重新导入'}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': f'导入用户失败: {str(e)}'}), 500
+
 @admin_bp.route('/users/<user_id>', methods=['DELETE'])
-@jwt_required()
+@role_required('admin')
 def delete_user(user_id):
     """删除用户"""
     try:
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
-        
-        if not current_user or current_user.role != 'admin':
-            return jsonify({'message': '权限不足'}), 403
-        
         user = User.query.get(user_id)
         if not user:
             return jsonify({'message': '用户不存在'}), 404
@@ -532,8 +612,12 @@ def delete_user(user_id):
         if user.role == 'admin':
             return jsonify({'message': '不能删除管理员账户'}), 400
         
+        # 先置空成果中的队长/提交人并同步统计汇总表，不依赖数据库的 SET NULL
+        detach_achievements(('leader_id', 'submitter_id'), user_id)
         db.session.delete(user)
         db.session.commit()
+        invalidate_user(user_id)
+        public_cache.invalidate()
         
         return jsonify({'message': '用户删除成功'}), 200
         
@@ -542,40 +626,37 @@ def delete_user(user_id):
         return jsonify({'message': f'删除用户失败: {str(e)}'}), 500
 
 @admin_bp.route('/statistics', methods=['GET'])
-@jwt_required()
+@role_required('admin')
 def get_admin_statistics():
     """获取管理员统计数据"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'admin':
-            return jsonify({'message': '权限不足'}), 403
-        
-        # 统计数据
-        stats = {}
-        stats['total_users'] = User.query.count()
-        stats['total_achievements'] = Achievement.query.count()
-        stats['total_classes'] = Class.query.count()
-        stats['pending_achievements'] = Achievement.query.filter_by(status='pending').count()
-        
-        # 按角色统计用户
-        role_stats = db.session.query(
-            User.role,
-            db.func.count(User.user_id).label('count')
-        ).group_by(User.role).all()
-        
-        stats['by_role'] = {role: count for role, count in role_stats}
-        
-        # 按状态统计成果
-        status_stats = db.session.query(
-            Achievement.status,
-            db.func.count(Achievement.achievement_id).label('count')
-        ).group_by(Achievement.status).all()
-        
-        stats['by_status'] = {status: count for status, count in status_stats}
+        # 用户一条聚合查询，成果数量读取统计汇总表
+        users = user_counts()
+        achievements = achievement_counts()
+        
+        stats = {
+            'total_users': users['total'],
+            'total_achievements': achievements['total'],
+            'total_classes': users['classes'],
+            'pending_achievements': achievements['by_status'].get('pending', 0),
+            'by_role': users['by_role'],
+            'by_status': achievements['by_status']
+        }
         
         return jsonify({'statistics': stats}), 200
         
     except Exception as e:
-        return jsonify({'message': f'获取统计数据失败: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'message': f'获取统计数据失败: {str(e)}'}), 500
+
+@admin_bp.route('/runtime-stats', methods=['GET'])
+@role_required('admin')
+def get_runtime_stats():
+    """获取当前工作进程的运行时指标（缓存命中率、密码哈希排队等）"""
+    try:
+        return jsonify({
+            'public_cache': public_cache.stats(),
+            'password_hashing': password_hasher.stats()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'message': f'获取运行时指标失败: {str(e)}'}), 500
\ No newline at end of file
@@ -3,6 +3,8 @@ from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
 from ..models.user import User
 from ..models.class_model import Class
+from ..utils.auth import user_claims
+from ..utils.passwords import HashingBusy, needs_rehash
 from .. import db
 
 auth_bp = Blueprint('auth', __name__)
@@ -26,7 +28,17 @@ def login():
         user = User.query.filter_by(username=username, is_active=True).first()
         
         if user and user.check_password(password):
-            access_token = create_access_token(identity=user.user_id)
+            # 哈希方法或参数已调整时，用本次登录的明文按新参数重算；
+            # 重算尽力而为，繁忙或提交失败时不影响登录，留待下次登录
+            if needs_rehash(user.password_hash):
+                try:
+                    user.set_password(password)
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    current_app.logger.warning('登录时重算密码哈希失败: %s', user.user_id, exc_info=True)
+            # 角色等信息写入令牌声明，接口鉴权时无需再查询用户
+            access_token = create_access_token(identity=user.user_id, additional_claims=user_claims(user))
             refresh_token = create_refresh_token(identity=user.user_id)
             
             return jsonify({
@@ -38,6 +50,8 @@ def login():
         else:
             return jsonify({'message': '用户名或密码错误'}), 401
             
+    except HashingBusy:
+        return jsonify({'message': '登录人数较多，请稍后重试'}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'message': f'登录失败: {str(e)}'}), 500
 
@@ -106,6 +120,9 @@ def register():
             'user': user.to_dict()
         }), 201
         
+    except HashingBusy:
+        db.session.rollback()
+        return jsonify({'message': '服务繁忙，请稍后重试'}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': f'注册失败: {str(e)}'}), 500
@@ -121,7 +138,7 @@ def refresh():
         if not user or not user.is_active:
             return jsonify({'message': '用户不存在或已被禁用'}), 401
         
-        new_token = create_access_token(identity=current_user_id)
+        new_token = create_access_token(identity=current_user_id, additional_claims=user_claims(user))
         return jsonify({'access_token': new_token}), 200
         
     except Exception as e:
@@ -201,6 +218,9 @@ def change_password():
         db.session.commit()
 
         return jsonify({'message': '密码修改成功'}), 200
+    except HashingBusy:
+        db.session.rollback()
+        return jsonify({'message': '服务繁忙，请稍后重试'}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': f'密码修改失败: {str(e)}'}), 500
@@ -1,7 +1,6 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models.user import User
 from ..models.system_config import SystemConfig
+from ..utils.auth import role_required
 from .. import db
 
 config_bp = Blueprint('config', __name__)
@@ -10,10 +9,7 @@ config_bp = Blueprint('config', __name__)
 def get_public_system_config():
     """获取公共系统配置 - 无需认证"""
     try:
-        # 确保默认配置已初始化
-        SystemConfig.init_default_configs()
-        
-        # 从数据库获取配置（只返回公共可见的配置）
+        # 从内存快照获取配置（只返回公共可见的配置）
         config = {
             'system_name': SystemConfig.get_config('system_name', '学生成果登记与管理系统'),
             'achievement_types': SystemConfig.get_config('achievement_types', [
@@ -35,20 +31,11 @@ def get_public_system_config():
         return jsonify({'message': f'获取系统配置失败: {str(e)}'}), 500
 
 @config_bp.route('/config', methods=['GET'])
-@jwt_required()
+@role_required()
 def get_system_config():
     """获取系统配置 - 所有用户都可以访问"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user:
-            return jsonify({'message': '用户不存在'}), 404
-        
-        # 确保默认配置已初始化
-        SystemConfig.init_default_configs()
-        
-        # 从数据库获取配置
+        # 从内存快照获取配置
         config = {
             'system_name': SystemConfig.get_config('system_name', '学生成果登记与管理系统'),
             'max_file_size': SystemConfig.get_config('max_file_size', 10),
@@ -72,16 +59,10 @@ def get_system_config():
         return jsonify({'message': f'获取系统配置失败: {str(e)}'}), 500
 
 @config_bp.route('/config', methods=['PUT'])
-@jwt_required()
+@role_required('admin')
 def update_system_config():
     """更新系统配置 - 仅管理员可以访问"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'admin':
-            return jsonify({'message': '权限不足'}), 403
-        
         data = request.get_json()
         
         # 保存配置到数据库
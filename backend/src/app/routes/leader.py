@@ -1,22 +1,29 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models.user import User
-from app.models.achievement import Achievement
-from app.models.audit_log import AuditLog
+from app.models.achievement import Achievement, serialize_achievements
+from app.models.audit_log import AuditLog, serialize_audit_log_rows
+from app.utils.pagination import keyset_paginate, InvalidCursor
+from app.utils.statistics import achievement_counts
+from app.utils.cache import public_cache
+from app.utils.auth import role_required
+from app.utils.bulk import (
+    LEADER_OPERATIONS, AUDIT_STATUS, AUDIT_BATCH_LIMIT, BulkOperationError, operation_values, bulk_update_achievements,
+    transition_pending, insert_audit_logs
+)
+from app.utils.export import EXPORT_FORMATS, export_filters, export_response
 from app import db
 
 leader_bp = Blueprint('leader', __name__)
 
+# 游标分页允许的排序列（均有索引）
+ACHIEVEMENT_KEYSET_SORTS = {'created_at': Achievement.created_at}
+
 @leader_bp.route('/pending-achievements', methods=['GET'])
-@jwt_required()
+@role_required('team_leader')
 def get_pending_achievements():
     """获取待审核的成果列表"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'team_leader':
-            return jsonify({'message': '权限不足'}), 403
         
         # 获取查询参数
         page = request.args.get('page', 1, type=int)
@@ -48,12 +55,10 @@ def get_pending_achievements():
         )
         
         # 获取提交人信息
-        achievement_list = []
-        for achievement in achievements.items:
-            achievement_dict = achievement.to_dict()
-            submitter = User.query.get(achievement.submitter_id)
+        achievement_list = serialize_achievements(achievements.items)
+        for achievement, achievement_dict in zip(achievements.items, achievement_list):
+            submitter = achievement.submitter
             achievement_dict['submitter_name'] = submitter.name if submitter else '未知'
-            achievement_list.append(achievement_dict)
         
         return jsonify({
             'achievements': achievement_list,
@@ -66,15 +71,11 @@ def get_pending_achievements():
         return jsonify({'message': f'获取待审核成果失败: {str(e)}'}), 500
 
 @leader_bp.route('/achievements', methods=['GET'])
-@jwt_required()
+@role_required('team_leader')
 def get_all_achievements():
     """获取所有管理的成果"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'team_leader':
-            return jsonify({'message': '权限不足'}), 403
         
         # 获取查询参数
         page = request.args.get('page', 1, type=int)
@@ -104,75 +105,174 @@ def get_all_achievements():
                 )
             )
         
-        # 分页查询
-        # 排序
-        try:
-            sort_column = getattr(Achievement, sort_by)
-        except AttributeError:
-            sort_column = Achievement.created_at
-        if sort_order == 'desc':
-            query = query.order_by(sort_column.desc())
+        cursor = request.args.get('cursor')
+        if cursor is not None:
+            # 游标分页：按 (排序列, 主键) 定位，不计算总数
+            if sort_by not in ACHIEVEMENT_KEYSET_SORTS:
+                return jsonify({'message': '游标分页不支持该排序字段'}), 400
+            items, next_cursor, prev_cursor = keyset_paginate(
+                query, ACHIEVEMENT_KEYSET_SORTS[sort_by], Achievement.achievement_id, cursor, per_page,
+                descending=sort_order == 'desc'
+            )
+            pagination = {'next_cursor': next_cursor, 'prev_cursor': prev_cursor, 'per_page': per_page}
         else:
-            query = query.order_by(sort_column)
+            # 分页查询
+            # 排序
+            try:
+                sort_column = getattr(Achievement, sort_by)
+            except AttributeError:
+                sort_column = Achievement.created_at
+            if sort_order == 'desc':
+                query = query.order_by(sort_column.desc())
+            else:
+                query = query.order_by(sort_column)
 
-        achievements = query.paginate(page=page, per_page=per_page, error_out=False)
+            achievements = query.paginate(page=page, per_page=per_page, error_out=False)
+            items = achievements.items
+            pagination = {'total': achievements.total, 'pages': achievements.pages, 'current_page': page}
         
         # 获取提交人信息
-        achievement_list = []
-        for achievement in achievements.items:
-            achievement_dict = achievement.to_dict()
-            submitter = User.query.get(achievement.submitter_id)
+        achievement_list = serialize_achievements(items)
+        for achievement, achievement_dict in zip(items, achievement_list):
+            submitter = achievement.submitter
             achievement_dict['submitter_name'] = submitter.name if submitter else '未知'
-            achievement_list.append(achievement_dict)
         
+        return jsonify({'achievements': achievement_list, **pagination}), 200
+        
+    except InvalidCursor:
+        return jsonify({'message': '分页游标无效'}), 400
+    except Exception as e:
+        return jsonify({'message': f'获取成果列表失败: {str(e)}'}), 500
+
+@leader_bp.route('/audit/batch', methods=['POST'])
+@role_required('team_leader')
+def batch_audit_achievements():
+    """批量审核成果
+
+    请求体 {"items": [{"achievement_id", "action", "comment"}, ...]}，最多 AUDIT_BATCH_LIMIT 项。
+    同一操作的成果用一条条件 UPDATE 完成状态转换，审核日志批量写入，统一提交；
+    results 与 items 按位置一一对应（index 为条目下标），参数无效、重复出现、
+    非待审核或不属于本队的条目逐项说明原因，不影响其他条目。
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        
+        data = request.get_json(silent=True)
+        items = data.get('items') if isinstance(data, dict) else None
+        if not isinstance(items, list):
+            return jsonify({'message': 'items 必须是数组'}), 400
+        if not items:
+            return jsonify({'message': '请选择要审核的成果'}), 400
+        if len(items) > AUDIT_BATCH_LIMIT:
+            return jsonify({'message': f'单次最多审核 {AUDIT_BATCH_LIMIT} 个成果'}), 400
+        
+        # 逐项校验参数，按操作分组；results 按条目下标记录结果
+        results = [None] * len(items)
+        first_index = {}
+        groups = {}
+        comments = {}
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[index] = {'success': False, 'message': '条目格式无效'}
+                continue
+            achievement_id = item.get('achievement_id')
+            action = item.get('action')
+            comment = item.get('comment') or ''
+            if not achievement_id or not isinstance(achievement_id, str):
+                results[index] = {'success': False, 'message': '缺少成果 ID 或格式无效'}
+            elif action not in AUDIT_STATUS:
+                results[index] = {'success': False, 'message': '无效的审核操作'}
+            elif not isinstance(comment, str):
+                results[index] = {'success': False, 'message': '审核意见格式无效'}
+            elif action in ('return', 'reject') and not comment:
+                results[index] = {'success': False, 'message': '退回或拒绝必须填写审核意见'}
+            elif achievement_id in first_index:
+                # 同一成果只按第一个有效条目处理
+                results[index] = {'success': False, 'message': f'与第 {first_index[achievement_id]} 项重复'}
+            else:
+                first_index[achievement_id] = index
+                groups.setdefault(action, []).append(achievement_id)
+                comments[achievement_id] = comment
+        
+        # 每种操作一条条件 UPDATE，只有待审核且属于本队的成果会被更新
+        outcomes = {}
+        logs = []
+        for action, achievement_ids in groups.items():
+            for achievement_id in transition_pending(achievement_ids, AUDIT_STATUS[action], current_user_id):
+                outcomes[achievement_id] = {'success': True, 'status': AUDIT_STATUS[action]}
+                logs.append({
+                    'achievement_id': achievement_id,
+                    'auditor_id': current_user_id,
+                    'action': action,
+                    'comment': comments[achievement_id]
+                })
+        insert_audit_logs(logs)
+        
+        # 未能转换的成果查明原因
+        failed_ids = [achievement_id for achievement_id in comments if achievement_id not in outcomes]
+        if failed_ids:
+            owned = {
+                row.achievement_id: row.status
+                for row in db.session.query(Achievement.achievement_id, Achievement.status).filter(
+                    Achievement.achievement_id.in_(failed_ids),
+                    Achievement.leader_id == current_user_id
+                )
+            }
+            for achievement_id in failed_ids:
+                if achievement_id in owned:
+                    outcomes[achievement_id] = {'success': False, 'message': '该成果已被审核'}
+                else:
+                    outcomes[achievement_id] = {'success': False, 'message': '成果不存在或无权限审核'}
+        
+        db.session.commit()
+        if logs:
+            public_cache.invalidate()
+        
+        report = []
+        for index, item in enumerate(items):
+            achievement_id = item.get('achievement_id') if isinstance(item, dict) else None
+            result = results[index] or outcomes[achievement_id]
+            report.append({'index': index, 'achievement_id': achievement_id, **result})
+        
+        succeeded = len(logs)
         return jsonify({
-            'achievements': achievement_list,
-            'total': achievements.total,
-            'pages': achievements.pages,
-            'current_page': page
+            'message': f'批量审核完成，成功 {succeeded} 个，失败 {len(items) - succeeded} 个',
+            'succeeded': succeeded,
+            'failed': len(items) - succeeded,
+            'results': report
         }), 200
         
     except Exception as e:
-        return jsonify({'message': f'获取成果列表失败: {str(e)}'}), 500
+        db.session.rollback()
+        return jsonify({'message': f'批量审核失败: {str(e)}'}), 500
 
 @leader_bp.route('/audit/<achievement_id>', methods=['POST'])
-@jwt_required()
+@role_required('team_leader')
 def audit_achievement(achievement_id):
     """审核成果"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
         
-        if not user or user.role != 'team_leader':
-            return jsonify({'message': '权限不足'}), 403
-
-        achievement: Achievement | None = Achievement.query.filter_by(
-            achievement_id=achievement_id,
-            leader_id=current_user_id
-        ).first()
-        
-        if not achievement:
-            return jsonify({'message': '成果不存在或无权限审核'}), 404
-        assert isinstance(achievement, Achievement)
-        if achievement.status != 'pending':
-            return jsonify({'message': '该成果已被审核'}), 400
-        
-        data = request.get_json()
+        data = request.get_json() or {}
         action: str = data.get('action')  # approve, return, reject
         comment: str = data.get('comment', '')
         
-        match action:
-            case 'approve':
-                achievement.status = action + 'd'
-            case 'return' | 'reject':
-                if not comment:
-                    return jsonify({'message': '退回或拒绝必须填写审核意见'}), 400
-                achievement.status = action + 'ed'
-            case _:
-                return jsonify({'message': '无效的审核操作'}), 400
-        
+        if action not in AUDIT_STATUS:
+            return jsonify({'message': '无效的审核操作'}), 400
+        if action in ('return', 'reject') and not comment:
+            return jsonify({'message': '退回或拒绝必须填写审核意见'}), 400
+        
+        # 条件更新：只有仍处于待审核状态时才会写入，并发审核时只有一个请求成功
+        if not transition_pending([achievement_id], AUDIT_STATUS[action], current_user_id):
+            status = db.session.query(Achievement.status).filter_by(
+                achievement_id=achievement_id,
+                leader_id=current_user_id
+            ).scalar()
+            if status is None:
+                return jsonify({'message': '成果不存在或无权限审核'}), 404
+            return jsonify({'message': '该成果已被审核'}), 400
         
-        # 记录审核日志
+        # 记录审核日志（仅在状态转换成功后写入）
         audit_log = AuditLog(
             achievement_id=achievement_id,
             auditor_id=current_user_id,
@@ -182,7 +282,9 @@ def audit_achievement(achievement_id):
         
         db.session.add(audit_log)
         db.session.commit()
+        public_cache.invalidate()
         
+        achievement = db.session.get(Achievement, achievement_id)
         return jsonify({
             'message': '审核完成',
             'achievement': achievement.to_dict(),
@@ -194,15 +296,11 @@ def audit_achievement(achievement_id):
         return jsonify({'message': f'审核失败: {str(e)}'}), 500
 
 @leader_bp.route('/achievements/<achievement_id>', methods=['PUT'])
-@jwt_required()
+@role_required('team_leader')
 def update_achievement_info(achievement_id):
     """更新成果信息（队长权限）"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'team_leader':
-            return jsonify({'message': '权限不足'}), 403
         
         achievement = Achievement.query.filter_by(
             achievement_id=achievement_id,
@@ -223,6 +321,7 @@ def update_achievement_info(achievement_id):
             achievement.is_public = data['is_public']
         
         db.session.commit()
+        public_cache.invalidate()
         
         return jsonify({
             'message': '成果信息更新成功',
@@ -234,39 +333,23 @@ def update_achievement_info(achievement_id):
         return jsonify({'message': f'更新成果信息失败: {str(e)}'}), 500
 
 @leader_bp.route('/statistics', methods=['GET'])
-@jwt_required()
+@role_required('team_leader')
 def get_statistics():
     """获取统计数据"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'team_leader':
-            return jsonify({'message': '权限不足'}), 403
-        
-        # 统计各状态成果数量
-        stats = {}
-        stats['total'] = Achievement.query.filter_by(leader_id=current_user_id).count()
-        stats['pending'] = Achievement.query.filter_by(leader_id=current_user_id, status='pending').count()
-        stats['approved'] = Achievement.query.filter_by(leader_id=current_user_id, status='approved').count()
-        stats['returned'] = Achievement.query.filter_by(leader_id=current_user_id, status='returned').count()
-        stats['rejected'] = Achievement.query.filter_by(leader_id=current_user_id, status='rejected').count()
-        
-        # 按类型统计
-        type_stats = db.session.query(
-            Achievement.type,
-            db.func.count(Achievement.achievement_id).label('count')
-        ).filter_by(leader_id=current_user_id).group_by(Achievement.type).all()
         
-        stats['by_type'] = {type_name: count for type_name, count in type_stats}
-        
-        # 按级别统计
-        level_stats = db.session.query(
-            Achievement.level,
-            db.func.count(Achievement.achievement_id).label('count')
-        ).filter_by(leader_id=current_user_id).group_by(Achievement.level).all()
-        
-        stats['by_level'] = {level_name: count for level_name, count in level_stats}
+        # 从统计汇总表读取各状态、类型、级别的成果数量
+        counts = achievement_counts('leader', current_user_id)
+        stats = {
+            'total': counts['total'],
+            'pending': counts['by_status'].get('pending', 0),
+            'approved': counts['by_status'].get('approved', 0),
+            'returned': counts['by_status'].get('returned', 0),
+            'rejected': counts['by_status'].get('rejected', 0),
+            'by_type': counts['by_type'],
+            'by_level': counts['by_level']
+        }
         
         return jsonify({'statistics': stats}), 200
         
@@ -274,49 +357,36 @@ def get_statistics():
         return jsonify({'message': f'获取统计数据失败: {str(e)}'}), 500
 
 @leader_bp.route('/audit-logs', methods=['GET'])
-@jwt_required()
+@role_required('team_leader')
 def get_audit_logs():
     """获取审核记录"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'team_leader':
-            return jsonify({'message': '权限不足'}), 403
         
         # 获取查询参数
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
         
-        # 查询审核记录
-        logs = AuditLog.query.filter_by(auditor_id=current_user_id)\
-            .order_by(AuditLog.audit_time.desc())\
-            .paginate(page=page, per_page=per_page, error_out=False)
-        
-        # 获取成果信息
-        log_list = []
-        for log in logs.items:
-            log_dict = {
-                'log_id': log.log_id,
-                'achievement_id': log.achievement_id,
-                'action': log.action,
-                'comment': log.comment,
-                'audit_time': log.audit_time.isoformat()
-            }
-            
-            # 获取成果标题
-            achievement = Achievement.query.get(log.achievement_id)
-            log_dict['achievement_title'] = achievement.title if achievement else '已删除的成果'
-            
-            log_list.append(log_dict)
+        # 查询审核记录（联表取出成果标题，避免逐条查询）
+        query = AuditLog.listing_query().filter(AuditLog.auditor_id == current_user_id)
         
-        return jsonify({
-            'logs': log_list,
-            'total': logs.total,
-            'pages': logs.pages,
-            'current_page': page
-        }), 200
+        cursor = request.args.get('cursor')
+        if cursor is not None:
+            items, next_cursor, prev_cursor = keyset_paginate(
+                query, AuditLog.audit_time, AuditLog.log_id, cursor, per_page,
+                key=lambda row: (row[0].audit_time, row[0].log_id)
+            )
+            pagination = {'next_cursor': next_cursor, 'prev_cursor': prev_cursor, 'per_page': per_page}
+        else:
+            logs = query.order_by(AuditLog.audit_time.desc())\
+                .paginate(page=page, per_page=per_page, error_out=False)
+            items = logs.items
+            pagination = {'total': logs.total, 'pages': logs.pages, 'current_page': page}
         
+        return jsonify({'logs': serialize_audit_log_rows(items), **pagination}), 200
+        
+    except InvalidCursor:
+        return jsonify({'message': '分页游标无效'}), 400
     except Exception as e:
         return jsonify({'message': f'获取审核记录失败: {str(e)}'}), 500
 
@@ -327,67 +397,60 @@ def get_team_achievements():
     return get_all_achievements()
 
 @leader_bp.route('/batch-operate', methods=['POST'])
-@jwt_required()
+@role_required('team_leader')
 def batch_operate_achievements():
-    """批量操作成果"""
+    """批量操作成果（set_public/set_private/set_class），只作用于本队成果"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
         
-        if not user or user.role != 'team_leader':
-            return jsonify({'message': '权限不足'}), 403
-        
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'message': '请求体必须是 JSON 对象'}), 400
         achievement_ids = data.get('achievement_ids', [])
-        operation = data.get('operation')  # set_public, set_private
+        operation = data.get('operation')
         value = data.get('value', True)
         
+        if not isinstance(achievement_ids, list) or not all(isinstance(item, str) for item in achievement_ids):
+            return jsonify({'message': 'achievement_ids 必须是成果 ID 数组'}), 400
         if not achievement_ids:
             return jsonify({'message': '请选择要操作的成果'}), 400
         
-        if operation not in ['set_public', 'set_private']:
+        if operation not in LEADER_OPERATIONS:
             return jsonify({'message': '无效的操作类型'}), 400
         
-        # 验证成果是否属于当前队长
-        achievements = Achievement.query.filter(
-            Achievement.achievement_id.in_(achievement_ids),
-            Achievement.leader_id == current_user_id
-        ).all()
-        
-        if len(achievements) != len(achievement_ids):
-            return jsonify({'message': '部分成果不存在或无权限操作'}), 403
-        
-        # 执行批量操作
-        for achievement in achievements:
-            if operation == 'set_public':
-                achievement.is_public = value
-            elif operation == 'set_private':
-                achievement.is_public = False
+        # 归属校验并入 UPDATE 的 WHERE 条件，不属于本队的成果不会被修改
+        affected = bulk_update_achievements(
+            achievement_ids, operation_values(operation, value), leader_id=current_user_id
+        )
         
         db.session.commit()
+        public_cache.invalidate()
         
         return jsonify({
-            'message': f'批量操作成功，共处理 {len(achievements)} 个成果'
+            'message': f'批量操作成功，共处理 {affected} 个成果',
+            'affected': affected,
+            'skipped': len(set(achievement_ids)) - affected
         }), 200
         
+    except BulkOperationError as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': f'批量操作失败: {str(e)}'}), 500
 
 @leader_bp.route('/export', methods=['GET'])
-@jwt_required()
+@role_required('team_leader')
 def export_achievements():
-    """导出成果报表"""
+    """导出本队成果报表（format=xlsx|csv|ndjson）"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'team_leader':
-            return jsonify({'message': '权限不足'}), 403
+        fmt = request.args.get('format', 'xlsx')
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({'message': '不支持的导出格式'}), 400
         
-        # 这里可以实现Excel导出功能
-        # 暂时返回成功消息
-        return jsonify({'message': '导出功能开发中'}), 200
+        filters = export_filters(request.args, leader_id=current_user_id)
+        return export_response(filters, fmt, prefix='team_achievements')
         
     except Exception as e:
         return jsonify({'message': f'导出失败: {str(e)}'}), 500
\ No newline at end of file
@@ -1,11 +1,14 @@
 from flask import Blueprint, jsonify, request
 from sqlalchemy import func, extract
-from ..models import Achievement, User, Class
+from ..models import Achievement, User, Class, serialize_achievements
+from ..utils.pagination import keyset_paginate, InvalidCursor
+from ..utils.cache import public_cache
 from .. import db
 
 public_bp = Blueprint('public', __name__, url_prefix='/api/public')
 
 @public_bp.route('/achievements', methods=['GET'])
+@public_cache.cached
 def get_public_achievements():
     """获取公开的成果列表"""
     try:
@@ -33,19 +36,26 @@ def get_public_achievements():
         if year:
             query = query.filter(extract('year', Achievement.award_date) == year)
         
-        # 分页查询
-        achievements = query.order_by(Achievement.award_date.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        cursor = request.args.get('cursor')
+        if cursor is not None:
+            items, next_cursor, prev_cursor = keyset_paginate(
+                query, Achievement.award_date, Achievement.achievement_id, cursor, per_page
+            )
+            pagination = {'next_cursor': next_cursor, 'prev_cursor': prev_cursor, 'per_page': per_page}
+        else:
+            # 分页查询
+            achievements = query.order_by(Achievement.award_date.desc()).paginate(
+                page=page, per_page=per_page, error_out=False
+            )
+            items = achievements.items
+            pagination = {'total': achievements.total, 'pages': achievements.pages, 'current_page': page}
         
         # 获取成果详细信息
-        achievement_list = []
-        for achievement in achievements.items:
-            achievement_dict = achievement.to_dict()
-            
+        achievement_list = serialize_achievements(items)
+        for achievement, achievement_dict in zip(items, achievement_list):
             # 获取班级信息
             if achievement.class_id:
-                class_info = Class.query.get(achievement.class_id)
+                class_info = achievement.class_info
                 achievement_dict['class_name'] = class_info.class_name if class_info else '未知班级'
                 achievement_dict['college'] = class_info.college if class_info else '未知学院'
             else:
@@ -56,20 +66,18 @@ def get_public_achievements():
             achievement_dict.pop('submitter_id', None)
             achievement_dict.pop('leader_id', None)
             achievement_dict.pop('evidence_files', None)  # 公开展示不显示佐证材料
-            
-            achievement_list.append(achievement_dict)
+            achievement_dict.pop('original_files', None)
+            achievement_dict.pop('evidence', None)
         
-        return jsonify({
-            'achievements': achievement_list,
-            'total': achievements.total,
-            'pages': achievements.pages,
-            'current_page': page
-        }), 200
+        return jsonify({'achievements': achievement_list, **pagination}), 200
         
+    except InvalidCursor:
+        return jsonify({'message': '分页游标无效'}), 400
     except Exception as e:
         return jsonify({'message': f'获取公开成果失败: {str(e)}'}), 500
 
 @public_bp.route('/statistics', methods=['GET'])
+@public_cache.cached
 def get_public_statistics():
     """获取公开成果统计数据"""
     try:
@@ -1,22 +1,21 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import get_jwt_identity
 from datetime import datetime
 from app.models.user import User
-from app.models import AuditLog, Achievement, Class
+from app.models import AuditLog, Achievement, Class, serialize_achievements
+from app.utils.statistics import achievement_counts
+from app.utils.auth import role_required, get_auth_state
+from app.utils.storage import clean_original_files
 from app import db
 
 student_bp = Blueprint('student', __name__)
 
 @student_bp.route('/achievements', methods=['GET'])
-@jwt_required()
+@role_required('student')
 def get_my_achievements():
     """获取我的成果列表"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'student':
-            return jsonify({'message': '权限不足'}), 403
         
         # 获取查询参数
         page = request.args.get('page', 1, type=int)
@@ -25,29 +24,38 @@ def get_my_achievements():
         type_filter = request.args.get('type')
         achievement_id = request.args.get('achievement_id')
         
-        # 构建查询
-        query = Achievement.query.filter_by(submitter_id=current_user_id)
+        # 构建查询：通过窗口函数一次性附带每个成果最新的审核意见
+        own_ids = db.select(Achievement.achievement_id).where(Achievement.submitter_id == current_user_id)
+        latest = AuditLog.latest_per_achievement(own_ids)
+        query = db.session.query(
+            Achievement,
+            latest.c.comment,
+            latest.c.action,
+            latest.c.audit_time
+        ).outerjoin(latest, latest.c.achievement_id == Achievement.achievement_id)\
+         .filter(Achievement.submitter_id == current_user_id)
         
         if status:
-            query = query.filter_by(status=status)
+            query = query.filter(Achievement.status == status)
         if type_filter:
-            query = query.filter_by(type=type_filter)
+            query = query.filter(Achievement.type == type_filter)
         if achievement_id:
-            query = query.filter_by(achievement_id=achievement_id)
+            query = query.filter(Achievement.achievement_id == achievement_id)
         
         # 分页查询
         achievements = query.order_by(Achievement.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
         
+        rows = achievements.items
+        achievement_list = serialize_achievements(row[0] for row in rows)
+        for (_, comment, action, audit_time), achievement_dict in zip(rows, achievement_list):
+            achievement_dict['comment'] = comment or ''
+            achievement_dict['audit_action'] = action
+            achievement_dict['audit_time'] = audit_time.isoformat() if audit_time else None
+        
         return jsonify({
-            'achievements': [
-                {
-                    **achievement.to_dict(),
-                    'comment': (auditlog.comment if (auditlog := AuditLog.query.filter_by(achievement_id=achievement.achievement_id).first()) else ''),
-                }
-                for achievement in achievements.items
-            ],
+            'achievements': achievement_list,
             'total': achievements.total,
             'pages': achievements.pages,
             'current_page': page
@@ -57,15 +65,11 @@ def get_my_achievements():
         return jsonify({'message': f'获取成果列表失败: {str(e)}'}), 500
 
 @student_bp.route('/achievements', methods=['POST'])
-@jwt_required()
+@role_required('student')
 def create_achievement():
     """创建成果或保存草稿"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'student':
-            return jsonify({'message': '权限不足'}), 403
         
         data = request.get_json()
         is_draft = data.get('is_draft', False)
@@ -90,11 +94,12 @@ def create_achievement():
             award_date=datetime.strptime(data['award_date'], '%Y-%m-%d').date() if data.get('award_date') and isinstance(data['award_date'], str) else data.get('award_date'),
             supervisor=data.get('supervisor'),
             members=data.get('members'),
-            class_id=user.class_id,
+            class_id=get_auth_state()['class_id'],
             leader_id=data.get('leader_id'),
             submitter_id=current_user_id,
             description=data.get('description'),
             evidence_files=data.get('evidence_files', []),
+            original_files=clean_original_files(data.get('original_files'), data.get('evidence_files')),
             status='draft' if is_draft else 'pending'
         )
         
@@ -111,15 +116,11 @@ def create_achievement():
         return jsonify({'message': f'创建成果失败: {str(e)}'}), 500
 
 @student_bp.route('/achievements/<achievement_id>', methods=['PUT'])
-@jwt_required()
+@role_required('student')
 def update_achievement(achievement_id):
     """更新成果或更新草稿"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'student':
-            return jsonify({'message': '权限不足'}), 403
         
         achievement = Achievement.query.filter_by(
             achievement_id=achievement_id,
@@ -169,6 +170,10 @@ def update_achievement(achievement_id):
             achievement.description = data['description']
         if 'evidence_files' in data:
             achievement.evidence_files = data['evidence_files']
+        if 'evidence_files' in data or 'original_files' in data:
+            achievement.original_files = clean_original_files(
+                data.get('original_files', achievement.original_files), achievement.evidence_files
+            )
         
         # 更新状态
         if is_draft:
@@ -189,15 +194,11 @@ def update_achievement(achievement_id):
         return jsonify({'message': f'更新成果失败: {str(e)}'}), 500
 
 @student_bp.route('/achievements/<achievement_id>', methods=['DELETE'])
-@jwt_required()
+@role_required('student')
 def delete_achievement(achievement_id):
     """删除成果（只能删除草稿）"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'student':
-            return jsonify({'message': '权限不足'}), 403
         
         achievement = Achievement.query.filter_by(
             achievement_id=achievement_id,
@@ -221,16 +222,10 @@ def delete_achievement(achievement_id):
         return jsonify({'message': f'删除成果失败: {str(e)}'}), 500
 
 @student_bp.route('/leaders', methods=['GET'])
-@jwt_required()
+@role_required('student')
 def get_leaders():
     """获取队长列表"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'student':
-            return jsonify({'message': '权限不足'}), 403
-        
         leaders = User.query.filter_by(role='team_leader', is_active=True).all()
         
         return jsonify({
@@ -241,16 +236,10 @@ def get_leaders():
         return jsonify({'message': f'获取队长列表失败: {str(e)}'}), 500
 
 @student_bp.route('/classes', methods=['GET'])
-@jwt_required()
+@role_required('student')
 def get_classes():
     """获取班级列表"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'student':
-            return jsonify({'message': '权限不足'}), 403
-        
         classes = Class.query.all()
         
         return jsonify({
@@ -261,39 +250,23 @@ def get_classes():
         return jsonify({'message': f'获取班级列表失败: {str(e)}'}), 500
 
 @student_bp.route('/statistics', methods=['GET'])
-@jwt_required()
+@role_required('student')
 def get_statistics():
     """获取学生统计数据"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'student':
-            return jsonify({'message': '权限不足'}), 403
-        
-        # 统计各状态成果数量
-        stats = {}
-        stats['total'] = Achievement.query.filter_by(submitter_id=current_user_id).count()
-        stats['pending'] = Achievement.query.filter_by(submitter_id=current_user_id, status='pending').count()
-        stats['approved'] = Achievement.query.filter_by(submitter_id=current_user_id, status='approved').count()
-        stats['returned'] = Achievement.query.filter_by(submitter_id=current_user_id, status='returned').count()
-        stats['rejected'] = Achievement.query.filter_by(submitter_id=current_user_id, status='rejected').count()
-        
-        # 按类型统计
-        type_stats = db.session.query(
-            Achievement.type,
-            db.func.count(Achievement.achievement_id).label('count')
-        ).filter_by(submitter_id=current_user_id).group_by(Achievement.type).all()
-        
-        stats['by_type'] = {type_name: count for type_name, count in type_stats}
-        
-        # 按级别统计
-        level_stats = db.session.query(
-            Achievement.level,
-            db.func.count(Achievement.achievement_id).label('count')
-        ).filter_by(submitter_id=current_user_id).group_by(Achievement.level).all()
-        
-        stats['by_level'] = {level_name: count for level_name, count in level_stats}
+        
+        # 从统计汇总表读取各状态、类型、级别的成果数量
+        counts = achievement_counts('submitter', current_user_id)
+        stats = {
+            'total': counts['total'],
+            'pending': counts['by_status'].get('pending', 0),
+            'approved': counts['by_status'].get('approved', 0),
+            'returned': counts['by_status'].get('returned', 0),
+            'rejected': counts['by_status'].get('rejected', 0),
+            'by_type': counts['by_type'],
+            'by_level': counts['by_level']
+        }
         
         return jsonify({'statistics': stats}), 200
         
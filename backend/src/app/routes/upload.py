@@ -1,12 +1,17 @@
-import os
-import uuid
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
+from ..utils.storage import (
+    FileTooLarge, UploadSessionError, SessionNotFound, OffsetMismatch, store_stream, file_url, blob_path,
+    cleanup_upload_sessions, create_upload_session, load_upload_session, append_chunk, complete_upload_session
+)
+from ..utils.thumbnails import schedule_thumbnail
+from ..utils.images import can_normalize, normalize_stored_image, discard_original
 
 upload_bp = Blueprint('upload', __name__)
 
 ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg'}
+MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 
 def allowed_file(filename):
     return '.' in filename and \
@@ -28,40 +33,173 @@ def upload_file():
         if not allowed_file(file.filename):
             return jsonify({'success': False, 'message': '不支持的文件格式'}), 400
         
-        # 检查文件大小 (10MB)
-        file.seek(0, os.SEEK_END)
-        file_size = file.tell()
-        file.seek(0)
-        
-        if file_size > 10 * 1024 * 1024:
-            return jsonify({'success': False, 'message': '文件大小不能超过10MB'}), 400
-        
-        # 生成唯一文件名
         filename = secure_filename(file.filename)
-        file_ext = filename.rsplit('.', 1)[1].lower()
-        unique_filename = f"{uuid.uuid4().hex}.{file_ext}"
+        file_ext = file.filename.rsplit('.', 1)[1].lower()
         
-        # 确保上传目录存在
-        upload_folder = current_app.config['UPLOAD_FOLDER']
-        if not os.path.exists(upload_folder):
-            os.makedirs(upload_folder)
+        # 开启图片规范化时，图片会在存储后压缩，允许更大的原图
+        max_size = MAX_FILE_SIZE
+        if current_app.config['IMAGE_NORMALIZE'] and can_normalize(file.filename):
+            max_size = current_app.config['IMAGE_MAX_UPLOAD_SIZE']
         
-        # 保存文件
-        file_path = os.path.join(upload_folder, unique_filename)
-        file.save(file_path)
+        # 边读边计算哈希，按内容存放，相同文件只保存一份
+        try:
+            stored_name, file_size, deduplicated = store_stream(file.stream, file_ext, max_size)
+        except FileTooLarge:
+            return jsonify({'success': False, 'message': f'文件大小不能超过{max_size // (1024 * 1024)}MB'}), 400
         
+        return jsonify({
+            'success': True,
+            'message': '文件上传成功',
+            'data': upload_result(stored_name, filename, file_size, deduplicated)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'文件上传失败: {str(e)}'}), 500
+
+def upload_result(stored_name, original_name, file_size, deduplicated):
+    """上传完成后的处理：按配置规范化图片、在后台生成缩略图，返回给前端的文件信息"""
+    result = {}
+    if current_app.config['IMAGE_NORMALIZE'] and can_normalize(stored_name):
+        try:
+            normalized = normalize_stored_image(stored_name)
+        except Exception as e:
+            # 无法解码等情况保留原文件
+            current_app.logger.warning('图片规范化失败: %s', e)
+        else:
+            if current_app.config['IMAGE_KEEP_ORIGINAL']:
+                # 保存成果时随 original_files 提交，作为原图的引用
+                result['original_file_path'] = file_url(stored_name)
+            elif not deduplicated and normalized[0] != stored_name:
+                discard_original(stored_name)
+            stored_name, file_size, deduplicated = normalized
+    
+    try:
+        schedule_thumbnail(blob_path(stored_name))
+    except Exception as e:
+        current_app.logger.warning('提交缩略图任务失败: %s', e)
+    
+    return {
         # 返回相对路径
-        relative_path = f"/uploads/{unique_filename}"
+        'file_path': file_url(stored_name),
+        'original_name': original_name,
+        'file_size': file_size,
+        'sha256': stored_name.split('.', 1)[0],
+        'deduplicated': deduplicated,
+        **result
+    }
+
+def _own_session(upload_id):
+    """当前用户的续传会话，不存在或不属于当前用户时返回 None"""
+    session = load_upload_session(upload_id)
+    if session is None or session['user_id'] != get_jwt_identity():
+        return None
+    return session
+
+@upload_bp.route('/upload/sessions', methods=['POST'])
+@jwt_required()
+def create_upload():
+    """创建断点续传会话
+
+    请求体 {"filename", "size", "sha256"(可选)}，之后按返回的 chunk_size
+    依次 PUT /upload/sessions/<id>?offset=N 上传数据，最后 POST .../complete。
+    """
+    try:
+        data = request.get_json() or {}
+        filename = data.get('filename') or ''
+        size = data.get('size')
+        
+        if not allowed_file(filename):
+            return jsonify({'success': False, 'message': '不支持的文件格式'}), 400
+        
+        max_size = current_app.config['RESUMABLE_UPLOAD_MAX_SIZE']
+        if not isinstance(size, int) or size <= 0:
+            return jsonify({'success': False, 'message': '无效的文件大小'}), 400
+        if size > max_size:
+            return jsonify({'success': False, 'message': f'文件大小不能超过{max_size // (1024 * 1024)}MB'}), 400
+        
+        cleanup_upload_sessions()
+        session = create_upload_session(
+            get_jwt_identity(), secure_filename(filename), filename.rsplit('.', 1)[1].lower(),
+            size, data.get('sha256')
+        )
         
         return jsonify({
             'success': True,
-            'message': '文件上传成功',
             'data': {
-                'file_path': relative_path,
-                'original_name': filename,
-                'file_size': file_size
+                'upload_id': session['upload_id'],
+                'offset': 0,
+                'chunk_size': current_app.config['RESUMABLE_UPLOAD_CHUNK_SIZE']
             }
+        }), 201
+        
+    except UploadSessionError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'创建上传失败: {str(e)}'}), 500
+
+@upload_bp.route('/upload/sessions/<upload_id>', methods=['GET'])
+@jwt_required()
+def get_upload(upload_id):
+    """查询续传进度，中断后从返回的 offset 继续上传"""
+    session = _own_session(upload_id)
+    if session is None:
+        return jsonify({'success': False, 'message': '上传会话不存在或已过期'}), 404
+    
+    return jsonify({
+        'success': True,
+        'data': {'upload_id': upload_id, 'offset': session['offset'], 'size': session['size']}
+    }), 200
+
+@upload_bp.route('/upload/sessions/<upload_id>', methods=['PUT'])
+@jwt_required()
+def upload_chunk(upload_id):
+    """上传一个分块：请求体为原始字节，offset 为该分块在文件中的起始位置"""
+    try:
+        session = _own_session(upload_id)
+        if session is None:
+            return jsonify({'success': False, 'message': '上传会话不存在或已过期'}), 404
+        
+        offset = request.args.get('offset', type=int)
+        if offset is None:
+            return jsonify({'success': False, 'message': '缺少 offset 参数'}), 400
+        
+        # 直接从请求流分块写盘，不在内存中缓存整个分块
+        new_offset = append_chunk(session, offset, request.stream)
+        
+        return jsonify({'success': True, 'data': {'offset': new_offset, 'size': session['size']}}), 200
+        
+    except OffsetMismatch as e:
+        return jsonify({'success': False, 'message': '分块偏移不一致', 'data': {'offset': e.offset}}), 409
+    except SessionNotFound as e:
+        return jsonify({'success': False, 'message': str(e)}), 404
+    except UploadSessionError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'分块上传失败: {str(e)}'}), 500
+
+@upload_bp.route('/upload/sessions/<upload_id>/complete', methods=['POST'])
+@jwt_required()
+def complete_upload(upload_id):
+    """完成上传：校验文件长度与 SHA-256 后存入上传目录"""
+    try:
+        session = _own_session(upload_id)
+        if session is None:
+            return jsonify({'success': False, 'message': '上传会话不存在或已过期'}), 404
+        
+        data = request.get_json(silent=True) or {}
+        stored_name, file_size, deduplicated = complete_upload_session(session, data.get('sha256'))
+        
+        return jsonify({
+            'success': True,
+            'message': '文件上传成功',
+            'data': upload_result(stored_name, session['filename'], file_size, deduplicated)
         }), 200
         
+    except OffsetMismatch as e:
+        return jsonify({'success': False, 'message': '文件尚未上传完整', 'data': {'offset': e.offset}}), 409
+    except SessionNotFound as e:
+        return jsonify({'success': False, 'message': str(e)}), 404
+    except UploadSessionError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
-        return jsonify({'success': False, 'message': f'文件上传失败: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'success': False, 'message': f'完成上传失败: {str(e)}'}), 500
\ No newline at end of file
@@ -1,6 +1,7 @@
 import os
 from app import create_app, db
 from app.models import User, Class, Achievement, AuditLog
+from app.models.system_config import SystemConfig
 
 
 def main():
@@ -16,6 +17,14 @@ def main():
             'AuditLog': AuditLog,
         }
 
+    # 启动时补充缺失的默认系统配置，读取接口不再负责初始化
+    with app.app_context():
+        try:
+            SystemConfig.init_default_configs()
+        except Exception as e:
+            db.session.rollback()
+            print(f"初始化默认系统配置失败: {e}")
+
     debug = os.getenv('FLASK_ENV', 'development') == 'development'
     app.run(debug=debug, host='0.0.0.0', port=int(os.getenv('PORT', '5000')))
 
@@ -0,0 +1,93 @@
+import threading
+import time
+from functools import wraps
+from flask import jsonify, current_app, g
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from app import db
+from app.models import User
+
+_lock = threading.Lock()
+# user_id -> (过期时间, 用户状态)
+_user_states = {}
+# user_id -> 本进程内最近一次修改该用户的时间戳
+_changed_at = {}
+
+
+def user_claims(user):
+    """写入访问令牌的附加声明"""
+    return {
+        'role': user.role,
+        'class_id': user.class_id,
+        'is_active': bool(user.is_active)
+    }
+
+
+def load_user_state(user_id):
+    """获取用户的角色、班级与启用状态，结果在进程内缓存 USER_CACHE_TTL 秒"""
+    now = time.monotonic()
+    with _lock:
+        entry = _user_states.get(user_id)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+
+    row = db.session.query(User.role, User.class_id, User.is_active)\
+        .filter(User.user_id == user_id).first()
+    state = {'role': row.role, 'class_id': row.class_id, 'is_active': bool(row.is_active)} if row else None
+
+    ttl = current_app.config.get('USER_CACHE_TTL', 0)
+    if ttl:
+        with _lock:
+            _user_states[user_id] = (now + ttl, state)
+    return state
+
+
+def invalidate_user(user_id):
+    """用户角色、班级或启用状态变更后调用，本进程内已签发令牌的声明随即失效"""
+    now = time.time()
+    max_age = current_app.config.get('ROLE_CLAIMS_MAX_AGE', 0)
+    with _lock:
+        _user_states.pop(user_id, None)
+        _changed_at[user_id] = now
+        # 超过声明有效期的记录已不再需要
+        for key in [k for k, t in _changed_at.items() if t < now - max_age]:
+            del _changed_at[key]
+
+
+def _resolve_auth_state():
+    """优先信任令牌声明；声明缺失、超过 ROLE_CLAIMS_MAX_AGE 或用户已被修改时回查用户状态"""
+    claims = get_jwt()
+    user_id = get_jwt_identity()
+    issued_at = claims.get('iat', 0)
+    max_age = current_app.config.get('ROLE_CLAIMS_MAX_AGE', 0)
+
+    with _lock:
+        changed_at = _changed_at.get(user_id, 0)
+    if 'role' in claims and time.time() - issued_at <= max_age and changed_at < issued_at:
+        return {'role': claims['role'], 'class_id': claims.get('class_id'), 'is_active': claims.get('is_active', True)}
+    return load_user_state(user_id)
+
+
+def get_auth_state():
+    """当前请求已校验的用户状态（role/class_id/is_active）"""
+    return g.auth_state
+
+
+def role_required(*roles):
+    """要求登录且角色在 roles 中（不指定则任意角色），鉴权不查询 users 表
+
+    停用或角色变更在 max(ROLE_CLAIMS_MAX_AGE, USER_CACHE_TTL) 秒内生效，
+    由本进程处理的变更立即生效。
+    """
+    def decorator(fn):
+        @wraps(fn)
+        @jwt_required()
+        def wrapper(*args, **kwargs):
+            state = _resolve_auth_state()
+            if not state or not state['is_active']:
+                return jsonify({'message': '用户不存在或已被禁用'}), 401
+            if roles and state['role'] not in roles:
+                return jsonify({'message': '权限不足'}), 403
+            g.auth_state = state
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
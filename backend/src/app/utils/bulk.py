@@ -0,0 +1,152 @@
+from app import db
+from app.models import Class, Achievement, AuditLog, AchievementStat
+from app.models.achievement_stat import STAT_FIELDS
+
+# 单条 UPDATE 的 IN 列表长度上限，超出时分块执行
+CHUNK_SIZE = 500
+
+# 各角色允许的批量操作；队长的状态变更走审核接口
+ADMIN_OPERATIONS = ('set_public', 'set_private', 'set_status', 'set_class')
+LEADER_OPERATIONS = ('set_public', 'set_private', 'set_class')
+
+# 审核操作 -> 审核后的成果状态
+AUDIT_STATUS = {'approve': 'approved', 'return': 'returned', 'reject': 'rejected'}
+# 单次批量审核的条目上限
+AUDIT_BATCH_LIMIT = 1000
+
+
+class BulkOperationError(ValueError):
+    """批量操作参数无效"""
+
+
+def operation_values(operation, value):
+    """把批量操作转换为要写入的列值"""
+    if operation == 'set_public':
+        return {'is_public': bool(value)}
+    if operation == 'set_private':
+        return {'is_public': False}
+    if operation == 'set_status':
+        if value not in Achievement.status.type.enums:
+            raise BulkOperationError('无效的成果状态')
+        return {'status': value}
+    if operation == 'set_class':
+        if not value or db.session.get(Class, value) is None:
+            raise BulkOperationError('班级不存在')
+        return {'class_id': value}
+    raise BulkOperationError('无效的操作类型')
+
+
+def chunked(items, size=CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def bulk_update_achievements(achievement_ids, values, leader_id=None):
+    """以集合方式批量更新成果，返回实际更新的行数
+
+    每块执行一条 UPDATE ... WHERE achievement_id IN (...)，传入 leader_id 时
+    归属校验并入 WHERE 条件，不属于该队长的成果不会被更新。
+    批量 UPDATE 不经过 after_flush，涉及统计字段时先锁定并读取旧值，
+    在同一事务内调整统计汇总表。调用方负责提交。
+    """
+    ids = list(dict.fromkeys(achievement_ids))
+    tracks_stats = any(field in values for field in STAT_FIELDS)
+    connection = db.session.connection()
+    affected = 0
+
+    for chunk in chunked(ids):
+        conditions = [Achievement.achievement_id.in_(chunk)]
+        if leader_id is not None:
+            conditions.append(Achievement.leader_id == leader_id)
+
+        if tracks_stats:
+            old_states = db.session.execute(
+                db.select(*(getattr(Achievement, field) for field in STAT_FIELDS))
+                .where(*conditions)
+                .with_for_update()
+            ).mappings().all()
+
+        result = db.session.execute(
+            db.update(Achievement).where(*conditions).values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        affected += result.rowcount
+
+        if tracks_stats and old_states:
+            AchievementStat.apply_states(connection, old_states, -1)
+            AchievementStat.apply_states(connection, [{**state, **values} for state in old_states], 1)
+
+    return affected
+
+
+def detach_achievements(fields, target_id):
+    """删除用户或班级前把成果中指向它的外键（fields 中的各列）置空，返回更新的行数
+
+    数据库的 ON DELETE SET NULL 不经过 after_flush，因此先以集合 UPDATE 置空，
+    并在同一事务内从统计汇总表中扣除对应维度的计数。调用方负责提交。
+    """
+    connection = db.session.connection()
+    affected = 0
+    for field in fields:
+        column = getattr(Achievement, field)
+        old_states = db.session.execute(
+            db.select(*(getattr(Achievement, name) for name in STAT_FIELDS))
+            .where(column == target_id)
+            .with_for_update()
+        ).mappings().all()
+        if not old_states:
+            continue
+        result = db.session.execute(
+            db.update(Achievement).where(column == target_id).values({field: None})
+            .execution_options(synchronize_session=False)
+        )
+        affected += result.rowcount
+        AchievementStat.apply_states(connection, old_states, -1)
+        AchievementStat.apply_states(connection, [{**state, field: None} for state in old_states], 1)
+    return affected
+
+
+def transition_pending(achievement_ids, new_status, leader_id):
+    """把本队待审核的成果条件更新为 new_status，返回实际完成转换的成果 id 列表
+
+    状态检查与写入在同一条 UPDATE ... WHERE status = 'pending' 中完成，
+    并发审核同一成果时只有一个请求能更新成功，不需要事先加行锁。
+    数据库支持 RETURNING 时直接取回被更新的行，否则先锁定读取再更新。
+    统计汇总表在同一事务内调整，调用方负责提交。
+    """
+    returning = [getattr(Achievement, field) for field in STAT_FIELDS] + [Achievement.achievement_id]
+    connection = db.session.connection()
+    transitioned = []
+
+    for chunk in chunked(list(dict.fromkeys(achievement_ids))):
+        conditions = [
+            Achievement.achievement_id.in_(chunk),
+            Achievement.leader_id == leader_id,
+            Achievement.status == 'pending',
+        ]
+        update = db.update(Achievement).where(*conditions).values(status=new_status)\
+            .execution_options(synchronize_session=False)
+
+        if connection.dialect.update_returning:
+            rows = db.session.execute(update.returning(*returning)).mappings().all()
+        else:
+            rows = db.session.execute(
+                db.select(*returning).where(*conditions).with_for_update()
+            ).mappings().all()
+            if rows:
+                db.session.execute(
+                    update.where(Achievement.achievement_id.in_([row['achievement_id'] for row in rows]))
+                )
+
+        if rows:
+            AchievementStat.apply_states(connection, [{**row, 'status': 'pending'} for row in rows], -1)
+            AchievementStat.apply_states(connection, [{**row, 'status': new_status} for row in rows], 1)
+        transitioned.extend(row['achievement_id'] for row in rows)
+
+    return transitioned
+
+
+def insert_audit_logs(logs):
+    """批量写入审核日志，logs 为包含 achievement_id/auditor_id/action/comment 的字典列表"""
+    if logs:
+        db.session.execute(db.insert(AuditLog), logs)
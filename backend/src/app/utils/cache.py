@@ -0,0 +1,139 @@
+import threading
+import time
+from functools import wraps
+from flask import request, current_app
+from app import db
+
+
+class ResponseCache:
+    """进程内 JSON 响应缓存
+
+    以请求路径和规范化（排序后）的查询参数为键，按 TTL 过期；
+    数据变化时调用 invalidate() 整体失效。条目保存在当前工作进程内，
+    失效时同时改写数据库中的共享版本行（system_configs 的 version_key），
+    其他进程读取缓存前检查该版本行，发现变化即清空自己的条目。
+    """
+
+    def __init__(self, name, ttl_config, max_entries_config, version_key, check_interval_config):
+        self.name = name
+        self.ttl_config = ttl_config
+        self.max_entries_config = max_entries_config
+        self.version_key = version_key
+        self.check_interval_config = check_interval_config
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._generation = 0
+        self._version = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key():
+        """请求路径 + 排序后的查询参数"""
+        args = sorted(request.args.items(multi=True))
+        return request.path, tuple(args)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl, generation, max_entries):
+        with self._lock:
+            # 计算期间发生过失效，结果可能已过时，不写入缓存
+            if generation != self._generation:
+                return
+            self._entries.pop(key, None)
+            while max_entries and len(self._entries) >= max_entries:
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = (time.monotonic() + ttl, value)
+
+    def sync_version(self):
+        """检查共享版本行，其他进程失效过缓存时清空本进程的条目
+
+        每隔 check_interval_config 秒检查一次（0 表示每次读取缓存前都检查）。
+        """
+        interval = current_app.config.get(self.check_interval_config, 0)
+        now = time.monotonic()
+        with self._lock:
+            if interval and now - self._checked_at < interval:
+                return
+
+        from app.models.system_config import SystemConfig
+        version = SystemConfig.read_stamp(self.version_key)
+        with self._lock:
+            self._checked_at = now
+            if version != self._version:
+                self._entries.clear()
+                self._generation += 1
+                self._version = version
+
+    def invalidate(self):
+        """清空缓存（在数据修改提交后调用），并通知其他进程"""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+        from app.models.system_config import SystemConfig
+        try:
+            version = SystemConfig.write_stamp(self.version_key, f'{self.name} 响应缓存版本')
+        except Exception:
+            # 数据修改已提交，版本行写入失败时其他进程最迟在 TTL 到期后刷新
+            db.session.rollback()
+            current_app.logger.exception('写入缓存版本行失败: %s', self.version_key)
+            return
+        with self._lock:
+            self._version = version
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'invalidations': self.invalidations
+            }
+
+    def cached(self, view):
+        """缓存视图函数的 200 响应"""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            ttl = current_app.config.get(self.ttl_config, 0)
+            if not ttl:
+                return view(*args, **kwargs)
+
+            self.sync_version()
+            key = self.make_key()
+            body = self.get(key)
+            if body is not None:
+                response = current_app.response_class(body, status=200, mimetype='application/json')
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            generation = self._generation
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                max_entries = current_app.config.get(self.max_entries_config, 0)
+                self.set(key, response.get_data(), ttl, generation, max_entries)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+
+
+# 公开展示接口（/api/public）的响应缓存
+public_cache = ResponseCache(
+    'public', 'PUBLIC_CACHE_TTL', 'PUBLIC_CACHE_MAX_ENTRIES',
+    '__public_cache_version__', 'PUBLIC_CACHE_CHECK_INTERVAL'
+)
@@ -0,0 +1,383 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+from flask import current_app, send_file, stream_with_context
+from openpyxl import Workbook
+from sqlalchemy.orm import aliased
+from app import db
+from app.models import User, Class, Achievement, AuditLog, ExportJob
+from app.utils.workers import get_pool
+from app.models.achievement import TYPE_DISPLAY, LEVEL_DISPLAY, STATUS_DISPLAY
+
+# 服务端游标每批取回的行数
+BATCH_SIZE = 1000
+# 响应分块大小（字节）
+CHUNK_SIZE = 64 * 1024
+
+# 导出列：(字段, 表头)
+EXPORT_COLUMNS = (
+    ('title', '成果名称'),
+    ('type', '成果类型'),
+    ('level', '获奖级别'),
+    ('award_date', '获奖日期'),
+    ('class_name', '班级'),
+    ('leader_name', '队长'),
+    ('submitter_name', '提交人'),
+    ('supervisor', '指导教师'),
+    ('members', '成员'),
+    ('status', '状态'),
+    ('is_public', '是否公开'),
+    ('audit_comment', '最新审核意见'),
+    ('audit_time', '最新审核时间'),
+    ('created_at', '提交时间'),
+)
+FILTER_KEYS = ('status', 'type', 'level', 'keyword')
+EXPORT_FORMATS = ('xlsx', 'csv', 'ndjson')
+# 后台导出任务使用的进程池名称
+EXPORT_JOB_POOL = 'export'
+
+
+def export_filters(args, leader_id=None):
+    """从查询参数中取出导出过滤条件（与成果列表接口一致）"""
+    filters = {key: args.get(key) for key in FILTER_KEYS if args.get(key)}
+    if leader_id:
+        filters['leader_id'] = leader_id
+    return filters
+
+
+def _filter_conditions(filters):
+    conditions = []
+    if filters.get('leader_id'):
+        conditions.append(Achievement.leader_id == filters['leader_id'])
+    if filters.get('status'):
+        conditions.append(Achievement.status == filters['status'])
+    if filters.get('type'):
+        conditions.append(Achievement.type == filters['type'])
+    if filters.get('level'):
+        conditions.append(Achievement.level == filters['level'])
+    if filters.get('keyword'):
+        keyword = filters['keyword']
+        conditions.append(db.or_(
+            Achievement.title.contains(keyword),
+            Achievement.description.contains(keyword),
+            Achievement.remarks.contains(keyword)
+        ))
+    return conditions
+
+
+def export_query(filters):
+    """导出查询：一次联表取出成果及班级、队长、提交人与最新审核意见，只选需要的列"""
+    leader = aliased(User)
+    submitter = aliased(User)
+    conditions = _filter_conditions(filters)
+    # 最新审核记录只在待导出的成果范围内计算
+    latest = AuditLog.latest_per_achievement(db.select(Achievement.achievement_id).where(*conditions))
+
+    query = db.session.query(
+        Achievement.achievement_id,
+        Achievement.title,
+        Achievement.type,
+        Achievement.level,
+        Achievement.award_date,
+        Achievement.supervisor,
+        Achievement.members,
+        Achievement.status,
+        Achievement.is_public,
+        Achievement.created_at,
+        Class.class_name,
+        leader.name.label('leader_name'),
+        submitter.name.label('submitter_name'),
+        latest.c.comment.label('audit_comment'),
+        latest.c.audit_time.label('audit_time')
+    ).outerjoin(Class, Class.class_id == Achievement.class_id)\
+     .outerjoin(leader, leader.user_id == Achievement.leader_id)\
+     .outerjoin(submitter, submitter.user_id == Achievement.submitter_id)\
+     .outerjoin(latest, latest.c.achievement_id == Achievement.achievement_id)\
+     .filter(*conditions)
+
+    # yield_per 使用服务端游标分批取行，内存占用与总行数无关
+    return query.order_by(Achievement.created_at.desc(), Achievement.achievement_id.desc())\
+        .yield_per(BATCH_SIZE)
+
+
+def export_count(filters):
+    """符合过滤条件的成果数量"""
+    return db.session.query(db.func.count(Achievement.achievement_id))\
+        .filter(*_filter_conditions(filters)).scalar()
+
+
+def export_row(row):
+    """将查询行转换为导出列的显示值"""
+    return {
+        'title': row.title,
+        'type': TYPE_DISPLAY.get(row.type, row.type),
+        'level': LEVEL_DISPLAY.get(row.level, row.level),
+        'award_date': row.award_date,
+        'class_name': row.class_name,
+        'leader_name': row.leader_name,
+        'submitter_name': row.submitter_name,
+        'supervisor': row.supervisor,
+        'members': '、'.join(row.members) if row.members else '',
+        'status': STATUS_DISPLAY.get(row.status, row.status),
+        'is_public': '是' if row.is_public else '否',
+        'audit_comment': row.audit_comment,
+        'audit_time': row.audit_time,
+        'created_at': row.created_at,
+    }
+
+
+def write_xlsx(rows, path):
+    """以只写模式逐行写入工作簿，已写入的行即时落盘，不在内存中保留"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('成果列表')
+    sheet.append([header for _, header in EXPORT_COLUMNS])
+    for row in rows:
+        values = export_row(row)
+        sheet.append([values[field] for field, _ in EXPORT_COLUMNS])
+    workbook.save(path)
+
+
+def export_filename(prefix, extension):
+    return f"{prefix}_{datetime.now().strftime('%Y%m%d%H%M%S')}.{extension}"
+
+
+def xlsx_response(filters, prefix='achievements'):
+    """生成 Excel 并以分块响应返回
+
+    xlsx 是 zip 格式，只能在写完后输出，因此先写入临时文件再分块发送。
+    打开后立即删除临时文件，响应未被读取（HEAD、客户端中途断开等）时也不会残留；
+    不支持删除已打开文件的系统上改为在响应关闭时删除。
+    """
+    fd, path = tempfile.mkstemp(prefix='export-', suffix='.xlsx')
+    os.close(fd)
+    try:
+        write_xlsx(export_query(filters), path)
+    except Exception:
+        os.remove(path)
+        raise
+
+    f = open(path, 'rb')
+    try:
+        os.remove(path)
+        removed = True
+    except OSError:
+        removed = False
+    response = send_file(
+        f,
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        as_attachment=True,
+        download_name=export_filename(prefix, 'xlsx')
+    )
+    if not removed:
+        response.call_on_close(lambda: os.remove(path))
+    return response
+
+
+def _buffered(lines):
+    """把逐行文本合并为约 CHUNK_SIZE 大小的块，减少响应分块数量"""
+    buffer, size = [], 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def csv_lines(rows):
+    """逐行生成 CSV 文本"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+
+    def take():
+        line = output.getvalue()
+        output.seek(0)
+        output.truncate()
+        return line
+
+    writer.writerow([header for _, header in EXPORT_COLUMNS])
+    yield take()
+    for row in rows:
+        values = export_row(row)
+        writer.writerow([values[field] for field, _ in EXPORT_COLUMNS])
+        yield take()
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'无法序列化的类型: {type(value).__name__}')
+
+
+def ndjson_lines(rows):
+    """逐行生成 NDJSON，每行一个成果对象
+
+    供程序读取，类型、级别、状态输出原始枚举值，成员与是否公开保留原始类型；显示名称只用于 CSV / XLSX。
+    """
+    for row in rows:
+        values = {
+            'achievement_id': row.achievement_id,
+            **export_row(row),
+            'type': row.type,
+            'level': row.level,
+            'status': row.status,
+            'is_public': bool(row.is_public),
+            'members': row.members or [],
+        }
+        yield json.dumps(values, ensure_ascii=False, default=_json_default) + '\n'
+
+
+def stream_response(filters, fmt, prefix='achievements'):
+    """以生成器响应流式输出 CSV / NDJSON，数据行边读游标边发送，不在内存中汇总"""
+    if fmt == 'csv':
+        lines, mimetype = csv_lines(export_query(filters)), 'text/csv'
+    else:
+        lines, mimetype = ndjson_lines(export_query(filters)), 'application/x-ndjson'
+
+    response = current_app.response_class(
+        stream_with_context(_buffered(lines)),
+        mimetype=mimetype
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename={export_filename(prefix, fmt)}'
+    return response
+
+
+def export_response(filters, fmt='xlsx', prefix='achievements'):
+    """按格式生成导出响应"""
+    if fmt == 'xlsx':
+        return xlsx_response(filters, prefix)
+    return stream_response(filters, fmt, prefix)
+
+
+def write_export(rows, fmt, path):
+    """按格式把导出行写入文件"""
+    if fmt == 'xlsx':
+        write_xlsx(rows, path)
+        return
+    lines = csv_lines(rows) if fmt == 'csv' else ndjson_lines(rows)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for chunk in _buffered(lines):
+            f.write(chunk)
+
+
+# ---- 后台导出任务 ----
+
+def export_dir():
+    """导出文件目录（UPLOAD_FOLDER/exports，不经 /uploads 对外提供）"""
+    path = os.path.join(current_app.config['UPLOAD_FOLDER'], 'exports')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _update_job(job_id, **values):
+    """在独立连接中更新任务状态，不影响正在读取游标的事务；返回受影响行数"""
+    table = ExportJob.__table__
+    conditions = [table.c.job_id == job_id]
+    expected = values.pop('expected_status', None)
+    if expected:
+        conditions.append(table.c.status == expected)
+    with db.engine.begin() as connection:
+        return connection.execute(table.update().where(*conditions).values(**values)).rowcount
+
+
+def _reporting(rows, report, every=BATCH_SIZE):
+    """透传数据行，每 every 行回报一次进度"""
+    count = 0
+    for row in rows:
+        yield row
+        count += 1
+        if count % every == 0:
+            report(count)
+    report(count)
+
+
+def execute_export_job(job_id):
+    """执行导出任务：先写入 .part 临时文件，完成后改名，失败时清理"""
+    job = db.session.get(ExportJob, job_id)
+    if job is None:
+        return
+    filters, fmt = job.filters or {}, job.format
+    # 以条件更新领取任务，避免同一任务被重复执行
+    if not _update_job(job_id, expected_status='pending', status='running', started_at=datetime.now()):
+        return
+
+    file_name = f'{job_id}.{fmt}'
+    path = os.path.join(export_dir(), file_name)
+    partial = path + '.part'
+    try:
+        _update_job(job_id, total_rows=export_count(filters))
+        rows = _reporting(export_query(filters), lambda n: _update_job(job_id, processed_rows=n))
+        write_export(rows, fmt, partial)
+        os.replace(partial, path)
+        _update_job(job_id, status='done', file_name=file_name, finished_at=datetime.now())
+    except Exception as e:
+        if os.path.exists(partial):
+            os.remove(partial)
+        _update_job(job_id, status='failed', error=str(e), finished_at=datetime.now())
+    finally:
+        db.session.remove()
+
+
+_worker_apps = {}
+
+
+def run_export_job(config_name, job_id):
+    """进程池入口：每个子进程按配置名创建一次应用后复用"""
+    app = _worker_apps.get(config_name)
+    if app is None:
+        from app import create_app
+        app = _worker_apps[config_name] = create_app(config_name)
+    with app.app_context():
+        execute_export_job(job_id)
+
+
+def submit_export_job(job_id):
+    """把已提交到数据库的任务交给导出进程池"""
+    pool = get_pool(EXPORT_JOB_POOL, current_app.config['EXPORT_JOB_WORKERS'])
+    pool.submit(run_export_job, current_app.config['CONFIG_NAME'], job_id)
+
+
+def active_export_jobs():
+    """排队或执行中的任务数量"""
+    return ExportJob.query.filter(ExportJob.status.in_(['pending', 'running'])).count()
+
+
+def cleanup_export_jobs():
+    """清理过期任务与文件
+
+    已结束超过 EXPORT_JOB_RETENTION 秒的任务连同文件删除；
+    开始执行超过 EXPORT_JOB_TIMEOUT 秒仍未结束的任务（如工作进程异常退出）标记为失败，
+    尚未开始的任务按创建时间计算；
+    导出目录中没有对应任务的过期文件一并删除。
+    """
+    now = datetime.now()
+    retention = timedelta(seconds=current_app.config['EXPORT_JOB_RETENTION'])
+    timeout = timedelta(seconds=current_app.config['EXPORT_JOB_TIMEOUT'])
+    directory = export_dir()
+
+    ExportJob.query.filter(
+        ExportJob.status.in_(['pending', 'running']),
+        db.func.coalesce(ExportJob.started_at, ExportJob.created_at) < now - timeout
+    ).update({'status': 'failed', 'error': '任务超时', 'finished_at': now}, synchronize_session=False)
+
+    expired = ExportJob.query.filter(
+        ExportJob.status.in_(['done', 'failed']),
+        ExportJob.finished_at < now - retention
+    )
+    for (file_name,) in expired.with_entities(ExportJob.file_name).all():
+        if file_name and os.path.exists(os.path.join(directory, file_name)):
+            os.remove(os.path.join(directory, file_name))
+    expired.delete(synchronize_session=False)
+    db.session.commit()
+
+    known = {job_id for (job_id,) in db.session.query(ExportJob.job_id).all()}
+    cutoff = (now - retention).timestamp()
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.split('.', 1)[0] not in known and os.path.getmtime(path) < cutoff:
+            os.remove(path)
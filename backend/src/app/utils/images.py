@@ -0,0 +1,85 @@
+import os
+import tempfile
+from flask import current_app
+from PIL import Image, ImageOps
+from app import db
+from app.models import Achievement
+from app.utils.storage import temp_dir, blob_path, commit_file, file_sha256
+
+# 可规范化的图片扩展名
+NORMALIZE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp'}
+# 输出格式 -> 扩展名
+OUTPUT_EXTENSIONS = {'jpeg': 'jpg', 'webp': 'webp'}
+
+
+def can_normalize(name):
+    return name.rsplit('.', 1)[-1].lower() in NORMALIZE_EXTENSIONS
+
+
+def normalize_image(source, max_edge, output_format, quality):
+    """按 EXIF 方向摆正、限制长边并重新编码，不保留 EXIF 等元数据，返回临时文件路径"""
+    fd, target = tempfile.mkstemp(dir=temp_dir(), prefix='normalize-')
+    os.close(fd)
+    try:
+        with Image.open(source) as image:
+            # JPEG 可按目标尺寸直接降采样解码
+            image.draft('RGB', (max_edge, max_edge))
+            icc_profile = image.info.get('icc_profile')
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+            if output_format == 'webp':
+                if image.mode not in ('RGB', 'RGBA'):
+                    image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+                image.save(target, 'WEBP', quality=quality, method=4, icc_profile=icc_profile)
+            else:
+                if image.mode != 'RGB':
+                    image = image.convert('RGB')
+                image.save(target, 'JPEG', quality=quality, optimize=True, progressive=True,
+                           icc_profile=icc_profile)
+        return target
+    except BaseException:
+        os.remove(target)
+        raise
+
+
+def normalize_stored_image(name):
+    """规范化已存储的图片并按内容哈希存放，返回 (文件名, 文件大小, 是否已存在)
+
+    原图是否删除由调用方按 IMAGE_KEEP_ORIGINAL 决定，见 discard_original。
+    """
+    config = current_app.config
+    output_format = config['IMAGE_NORMALIZE_FORMAT']
+    source = blob_path(name)
+
+    temp_path = normalize_image(source, config['IMAGE_MAX_EDGE'], output_format, config['IMAGE_QUALITY'])
+    size = os.path.getsize(temp_path)
+    normalized, normalized_deduplicated = commit_file(
+        temp_path, file_sha256(temp_path), OUTPUT_EXTENSIONS[output_format]
+    )
+    return normalized, size, normalized_deduplicated
+
+
+def is_referenced(name):
+    """是否有成果的佐证材料或保留原图引用了该文件"""
+    pattern = f'%{name}%'
+    return db.session.query(
+        Achievement.query.filter(db.or_(
+            db.cast(Achievement.evidence_files, db.Text).like(pattern),
+            db.cast(Achievement.original_files, db.Text).like(pattern)
+        )).exists()
+    ).scalar()
+
+
+def discard_original(name):
+    """规范化后删除本次新存入的原图，返回是否删除
+
+    内容寻址文件可能被其他成果引用，仍被引用时保留；调用方只对本次上传新写入（非去重命中）的原图调用。
+    """
+    if is_referenced(name):
+        return False
+    try:
+        os.remove(blob_path(name))
+    except FileNotFoundError:
+        return False
+    return True
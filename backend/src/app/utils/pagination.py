@@ -0,0 +1,90 @@
+import base64
+import json
+from datetime import date, datetime
+from app import db
+
+
+class InvalidCursor(ValueError):
+    """分页游标无效"""
+
+
+def _dump_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _load_value(value, column):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return value
+
+
+def encode_cursor(values, direction):
+    """将排序键编码为不透明的游标字符串"""
+    payload = json.dumps({'v': [_dump_value(v) for v in values], 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """解析游标，返回 (排序键值, 翻页方向)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values, direction = payload['v'], payload['d']
+        if direction not in ('next', 'prev') or len(values) != len(columns):
+            raise InvalidCursor(cursor)
+        return tuple(_load_value(v, c) for v, c in zip(values, columns)), direction
+    except InvalidCursor:
+        raise
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+def keyset_paginate(query, sort_column, pk_column, cursor, per_page, descending=True, key=None):
+    """游标分页：按 (sort_column, pk_column) 定位下一页，不使用 OFFSET 与 COUNT
+
+    cursor 为空字符串表示第一页。key 用于从结果行中取出排序键，
+    默认按列名读取属性；多实体查询需自行传入。
+    返回 (items, next_cursor, prev_cursor)，没有更多数据时游标为 None。
+    """
+    columns = (sort_column, pk_column)
+    if key is None:
+        key = lambda item: (getattr(item, sort_column.key), getattr(item, pk_column.key))
+
+    backwards = False
+    query = query.order_by(None)
+    if cursor:
+        values, direction = decode_cursor(cursor, columns)
+        backwards = direction == 'prev'
+        # 向前翻页时反转排序方向，取到结果后再倒序还原
+        seek_desc = descending != backwards
+        position = db.tuple_(*columns)
+        query = query.filter(position < db.tuple_(*values) if seek_desc else position > db.tuple_(*values))
+    else:
+        seek_desc = descending
+
+    if seek_desc:
+        query = query.order_by(sort_column.desc(), pk_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), pk_column.asc())
+
+    items = query.limit(per_page + 1).all()
+    has_more = len(items) > per_page
+    items = items[:per_page]
+    if backwards:
+        items.reverse()
+
+    if not items:
+        return items, None, None
+
+    has_next = has_more if not backwards else True
+    has_prev = bool(cursor) if not backwards else has_more
+    next_cursor = encode_cursor(key(items[-1]), 'next') if has_next else None
+    prev_cursor = encode_cursor(key(items[0]), 'prev') if has_prev else None
+    return items, next_cursor, prev_cursor
@@ -0,0 +1,158 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from functools import lru_cache
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+BCRYPT_PREFIXES = ('$2a$', '$2b$', '$2y$')
+BCRYPT_DEFAULT_ROUNDS = 12
+# bcrypt 只使用密码的前 72 字节
+BCRYPT_MAX_BYTES = 72
+
+
+class HashingBusy(RuntimeError):
+    """密码哈希排队已满或等待超时"""
+
+
+def _bcrypt_rounds(method):
+    """'bcrypt' / 'bcrypt:12' -> 轮数；非 bcrypt 方法返回 None"""
+    name, _, rounds = method.partition(':')
+    if name != 'bcrypt':
+        return None
+    return int(rounds or BCRYPT_DEFAULT_ROUNDS)
+
+
+def _hash(password, method):
+    rounds = _bcrypt_rounds(method)
+    if rounds is None:
+        return generate_password_hash(password, method)
+    import bcrypt
+    secret = password.encode('utf-8')[:BCRYPT_MAX_BYTES]
+    return bcrypt.hashpw(secret, bcrypt.gensalt(rounds)).decode('ascii')
+
+
+def _verify(pwhash, password):
+    if not pwhash.startswith(BCRYPT_PREFIXES):
+        return check_password_hash(pwhash, password)
+    import bcrypt
+    try:
+        return bcrypt.checkpw(password.encode('utf-8')[:BCRYPT_MAX_BYTES], pwhash.encode('ascii'))
+    except ValueError:
+        return False
+
+
+@lru_cache(maxsize=None)
+def _method_prefix(method):
+    """按 method 生成的哈希所带的前缀
+
+    werkzeug 会补全省略的参数（如 scrypt -> scrypt:32768:8:1），因此用一次样本哈希取得前缀。
+    """
+    rounds = _bcrypt_rounds(method)
+    if rounds is not None:
+        return f'$2b${rounds:02d}$'
+    return generate_password_hash('', method).split('$', 1)[0] + '$'
+
+
+class PasswordHasher:
+    """有界的密码哈希线程池
+
+    scrypt/pbkdf2/bcrypt 计算期间释放 GIL，同时进行的哈希数限制为 PASSWORD_HASH_WORKERS，
+    避免登录高峰时所有请求线程同时争抢 CPU、每次登录都被拖慢；
+    排队（含执行中）超过 PASSWORD_HASH_MAX_PENDING 或等待超过 PASSWORD_HASH_TIMEOUT 秒时
+    抛出 HashingBusy，由接口返回 503 让客户端稍后重试。
+
+    注意：请求线程在 run() 中同步等待结果，线程池只限制哈希占用的 CPU 并在过载时快速拒绝，
+    并不会释放 WSGI 工作线程；排队期间该线程仍被占用，最长 PASSWORD_HASH_TIMEOUT 秒。
+    超时只取消尚未开始的任务，已在计算的哈希会继续算完并计入 pending，调用方此时已收到 503；
+    因此 PASSWORD_HASH_TIMEOUT 必须大于最坏情况下的单次哈希耗时，
+    PASSWORD_HASH_MAX_PENDING 按 线程数 × 超时 / 单次哈希耗时 估算，避免超时的任务持续占满名额。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._wait_seconds = 0.0
+        self._hash_seconds = 0.0
+        self.max_hash_seconds = 0.0
+
+    def run(self, func, *args):
+        """在线程池中执行 func 并等待结果（阻塞调用线程）"""
+        config = current_app.config
+        with self._lock:
+            if self.pending >= config['PASSWORD_HASH_MAX_PENDING']:
+                self.rejected += 1
+                raise HashingBusy('密码校验繁忙')
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=config['PASSWORD_HASH_WORKERS'],
+                    thread_name_prefix='password-hash'
+                )
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+
+        queued_at = time.monotonic()
+
+        def task():
+            started = time.monotonic()
+            try:
+                return func(*args)
+            finally:
+                elapsed = time.monotonic() - started
+                with self._lock:
+                    self.pending -= 1
+                    self.completed += 1
+                    self._wait_seconds += started - queued_at
+                    self._hash_seconds += elapsed
+                    self.max_hash_seconds = max(self.max_hash_seconds, elapsed)
+
+        future = self._executor.submit(task)
+        try:
+            return future.result(timeout=config['PASSWORD_HASH_TIMEOUT'])
+        except TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+                # 尚未开始执行的任务直接取消，不会再进入 task 的计数
+                if future.cancel():
+                    self.pending -= 1
+            raise HashingBusy('密码校验超时')
+
+    def stats(self):
+        with self._lock:
+            return {
+                'method': current_app.config['PASSWORD_HASH_METHOD'],
+                'workers': current_app.config['PASSWORD_HASH_WORKERS'],
+                'pending': self.pending,
+                'peak_pending': self.peak_pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': round(self._wait_seconds * 1000 / self.completed, 2) if self.completed else 0.0,
+                'avg_hash_ms': round(self._hash_seconds * 1000 / self.completed, 2) if self.completed else 0.0,
+                'max_hash_ms': round(self.max_hash_seconds * 1000, 2)
+            }
+
+
+password_hasher = PasswordHasher()
+
+
+def hash_password(password):
+    """按 PASSWORD_HASH_METHOD 计算密码哈希"""
+    return password_hasher.run(_hash, password, current_app.config['PASSWORD_HASH_METHOD'])
+
+
+def verify_password(pwhash, password):
+    """校验密码，支持 werkzeug 格式与 bcrypt 格式的哈希"""
+    if not pwhash:
+        return False
+    return password_hasher.run(_verify, pwhash, password)
+
+
+def needs_rehash(pwhash):
+    """哈希方法或参数与当前配置不一致时返回 True"""
+    return not pwhash.startswith(_method_prefix(current_app.config['PASSWORD_HASH_METHOD']))
@@ -0,0 +1,264 @@
+import csv
+import io
+from openpyxl import load_workbook
+from app import db
+from app.models import User, Class
+
+COLLEGE_DEFAULT = '信息网络安全学院'
+MAJOR_DEFAULT = None  # 无专业字段时置空
+# 每条 INSERT 写入的行数
+BATCH_SIZE = 1000
+ROSTER_FORMATS = ('xlsx', 'csv')
+
+
+class RosterError(ValueError):
+    """名单文件无法解析"""
+
+
+def _cell(row, idx):
+    return str(row[idx]).strip() if idx < len(row) and row[idx] is not None else ''
+
+
+def _iter_rows(source, file_format):
+    """逐行读取名单文件（xlsx 只读模式或 UTF-8 CSV），source 为路径或二进制文件对象"""
+    if file_format == 'csv':
+        if isinstance(source, str):
+            source = open(source, 'rb')
+        with io.TextIOWrapper(source, encoding='utf-8-sig', newline='') as text:
+            try:
+                yield from csv.reader(text)
+            except UnicodeDecodeError:
+                raise RosterError('CSV 文件需使用 UTF-8 编码')
+        return
+
+    try:
+        wb = load_workbook(source, read_only=True, data_only=True)
+    except Exception:
+        raise RosterError('无法读取 Excel 文件')
+    try:
+        yield from wb.active.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def _headers(rows):
+    return [str(v).strip() if v is not None else '' for v in next(rows, ())]
+
+
+def iter_students(source, file_format='xlsx'):
+    """逐行读取学生名单，生成 (行号, 学生项)，不把整个文件载入内存
+
+    表头：学号, 姓名, 年级, 区队, 区队（第二个“区队”列为全称）；空行跳过。
+    学生项：{'username','name','grade','team_short','team_full'}，学号或姓名为空时保留空串，由调用方校验。
+    """
+    rows = _iter_rows(source, file_format)
+    headers = _headers(rows)
+    try:
+        idx_sid = headers.index('学号')
+        idx_name = headers.index('姓名')
+        idx_grade = headers.index('年级')
+        # 两个“区队”列：短称与全称
+        idx_team_short = headers.index('区队')
+        idx_team_full = headers.index('区队', idx_team_short + 1)
+    except ValueError:
+        raise RosterError('学生名单表头不符合预期，请确保包含：学号, 姓名, 年级, 区队(两列)')
+
+    for line, row in enumerate(rows, start=2):
+        if not any(value not in (None, '') for value in row):
+            continue
+        grade = _cell(row, idx_grade)
+        # 年级标准化：如 "22" -> "2022"
+        if len(grade) == 2 and grade.isdigit():
+            grade = '20' + grade
+        team_short = _cell(row, idx_team_short)
+        yield line, {
+            'username': _cell(row, idx_sid),
+            'name': _cell(row, idx_name),
+            'grade': grade,
+            'team_short': team_short,
+            'team_full': _cell(row, idx_team_full) or team_short,
+        }
+
+
+def class_data(student):
+    """学生所属班级（按区队全称）的建班数据"""
+    return {
+        'class_name': student['team_full'] or '未分配区队',
+        'college': COLLEGE_DEFAULT,
+        'grade': student['grade'],
+        'major': MAJOR_DEFAULT,
+    }
+
+
+def load_students(source, file_format='xlsx'):
+    """读取学生名单，返回学生列表和班级字典（按全称聚合），跳过学号或姓名为空的行"""
+    students = []
+    classes_map = {}
+    for _, student in iter_students(source, file_format):
+        if not student['username'] or not student['name']:
+            continue
+        students.append(student)
+        data = class_data(student)
+        classes_map.setdefault(data['class_name'], data)
+    return students, classes_map
+
+
+def load_leaders(source, file_format='xlsx'):
+    """读取队长名单（表头：姓名, 职务），用户名自动生成为 leader001…
+    队长项：{'username','name','duty'}
+    """
+    rows = _iter_rows(source, file_format)
+    headers = _headers(rows)
+    try:
+        idx_name = headers.index('姓名')
+        idx_duty = headers.index('职务')
+    except ValueError:
+        raise RosterError('队长名单表头不符合预期，请确保包含：姓名, 职务')
+
+    leaders = []
+    for row in rows:
+        name = _cell(row, idx_name)
+        if name:
+            leaders.append({'username': f'leader{len(leaders) + 1:03d}', 'name': name, 'duty': _cell(row, idx_duty)})
+    return leaders
+
+
+def class_ids(names):
+    """按名称批量查询班级，返回 班级名 -> class_id"""
+    ids = {}
+    names = list(names)
+    for start in range(0, len(names), BATCH_SIZE):
+        ids.update(
+            db.session.query(Class.class_name, Class.class_id)
+            .filter(Class.class_name.in_(names[start:start + BATCH_SIZE]))
+        )
+    return ids
+
+
+def existing_usernames(usernames):
+    """批量查询已存在的用户名"""
+    found = set()
+    usernames = list(usernames)
+    for start in range(0, len(usernames), BATCH_SIZE):
+        found.update(
+            name for name, in db.session.query(User.username)
+            .filter(User.username.in_(usernames[start:start + BATCH_SIZE]))
+        )
+    return found
+
+
+def ensure_classes(classes_map):
+    """按班级名补充缺失的班级（批量插入），返回 (班级名 -> class_id, 新增数)"""
+    existing = class_ids(classes_map)
+    missing = [data for name, data in classes_map.items() if name not in existing]
+    for start in range(0, len(missing), BATCH_SIZE):
+        db.session.execute(db.insert(Class).values(missing[start:start + BATCH_SIZE]))
+    if missing:
+        existing.update(class_ids(data['class_name'] for data in missing))
+    return existing, len(missing)
+
+
+def insert_users(rows):
+    """分批插入新账号（调用方已确认用户名不存在），rows 为包含 User 列值的字典列表"""
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(db.insert(User), rows[start:start + BATCH_SIZE])
+
+
+def upsert_users(rows):
+    """按用户名批量 upsert 账号，返回新增或有变化的行数
+
+    同一用户名出现多次时以最后一行为准；已存在的账号只在姓名或班级不同时更新，不修改密码与角色；
+    PostgreSQL/SQLite 使用 INSERT ... ON CONFLICT (username) DO UPDATE ... WHERE ... IS DISTINCT FROM，
+    其他数据库先批量查出已有账号再分别插入与更新。
+    """
+    rows = list({row['username']: row for row in rows}.values())
+    table = User.__table__
+    dialect = db.session.connection().dialect.name
+    changed = 0
+    for start in range(0, len(rows), BATCH_SIZE):
+        batch = rows[start:start + BATCH_SIZE]
+        if dialect in ('postgresql', 'sqlite'):
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            stmt = insert(table).values(batch)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['username'],
+                set_={'name': stmt.excluded.name, 'class_id': stmt.excluded.class_id},
+                where=db.or_(
+                    table.c.name.is_distinct_from(stmt.excluded.name),
+                    table.c.class_id.is_distinct_from(stmt.excluded.class_id)
+                )
+            )
+            changed += db.session.execute(stmt).rowcount
+            continue
+
+        existing = {
+            row.username: row
+            for row in db.session.query(User.username, User.name, User.class_id)
+            .filter(User.username.in_([item['username'] for item in batch]))
+        }
+        new_rows = [item for item in batch if item['username'] not in existing]
+        if new_rows:
+            db.session.execute(table.insert().values(new_rows))
+        updates = [
+            item for item in batch
+            if item['username'] in existing
+            and (existing[item['username']].name, existing[item['username']].class_id) != (item['name'], item.get('class_id'))
+        ]
+        for item in updates:
+            db.session.execute(
+                table.update().where(table.c.username == item['username'])
+                .values(name=item['name'], class_id=item.get('class_id'))
+            )
+        changed += len(new_rows) + len(updates)
+    return changed
+
+
+def validate_students(rows, create_classes=False):
+    """校验学生名单，返回 (可导入的学生项列表, 需新建的班级字典, 错误列表)
+
+    rows 为 iter_students 生成的 (行号, 学生项)。用户名与班级各用集合查询一次性比对，
+    不逐行查询数据库；错误项为 {'row','username','message'}，文件内重复的学号只保留首次出现。
+    """
+    students = []
+    errors = []
+    seen = {}
+    for line, student in rows:
+        username = student['username']
+        if not username or not student['name']:
+            errors.append({'row': line, 'username': username, 'message': '学号和姓名不能为空'})
+        elif len(username) > 50 or len(student['name']) > 50:
+            errors.append({'row': line, 'username': username, 'message': '学号或姓名超过 50 个字符'})
+        elif username in seen:
+            errors.append({'row': line, 'username': username, 'message': f'学号与第 {seen[username]} 行重复'})
+        else:
+            seen[username] = line
+            students.append((line, student))
+
+    taken = existing_usernames(seen)
+    wanted = {}
+    for _, student in students:
+        data = class_data(student)
+        wanted.setdefault(data['class_name'], data)
+    found = class_ids(wanted)
+
+    valid = []
+    for line, student in students:
+        class_name = class_data(student)['class_name']
+        if student['username'] in taken:
+            errors.append({'row': line, 'username': student['username'], 'message': '用户名已存在'})
+        elif class_name not in found and not create_classes:
+            errors.append({'row': line, 'username': student['username'], 'message': f'班级不存在：{class_name}'})
+        else:
+            valid.append(student)
+
+    missing = {}
+    if create_classes:
+        for student in valid:
+            data = class_data(student)
+            if data['class_name'] not in found:
+                missing.setdefault(data['class_name'], data)
+    errors.sort(key=lambda error: error['row'])
+    return valid, missing, errors
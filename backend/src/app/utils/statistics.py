@@ -0,0 +1,51 @@
+from collections import Counter
+from app import db
+from app.models import User, Class, AchievementStat
+
+
+def _conditional_counts(count, column):
+    """为枚举列的每个取值生成 COUNT(...) FILTER (WHERE column = value)"""
+    return [(value, count.filter(column == value)) for value in column.type.enums]
+
+
+def achievement_counts(scope='global', scope_id=''):
+    """从统计汇总表读取成果数量
+
+    返回总数以及按状态、类型、级别的分布，分布中只保留数量大于 0 的项，
+    与原先 GROUP BY 查询的结果格式一致。汇总表以 (scope, scope_id) 开头的主键查找，
+    不再扫描 achievements 表。
+    """
+    rows = db.session.query(
+        AchievementStat.status,
+        AchievementStat.type,
+        AchievementStat.level,
+        db.func.sum(AchievementStat.count)
+    ).filter(
+        AchievementStat.scope == scope,
+        AchievementStat.scope_id == scope_id
+    ).group_by(AchievementStat.status, AchievementStat.type, AchievementStat.level).all()
+
+    stats = {'total': 0, 'by_status': Counter(), 'by_type': Counter(), 'by_level': Counter()}
+    for status, type_, level, count in rows:
+        count = int(count or 0)
+        stats['total'] += count
+        stats['by_status'][status] += count
+        stats['by_type'][type_] += count
+        stats['by_level'][level] += count
+    for name in ('by_status', 'by_type', 'by_level'):
+        stats[name] = {key: n for key, n in stats[name].items() if key and n > 0}
+    return stats
+
+
+def user_counts():
+    """单条聚合查询统计用户总数、按角色分布以及班级总数"""
+    count = db.func.count(User.user_id)
+    by_role = _conditional_counts(count, User.role)
+    class_total = db.select(db.func.count(Class.class_id)).scalar_subquery()
+    row = iter(db.session.query(count, class_total, *(expr for _, expr in by_role)).one())
+
+    return {
+        'total': next(row),
+        'classes': next(row),
+        'by_role': {role: n for (role, _), n in zip(by_role, row) if n},
+    }
@@ -0,0 +1,446 @@
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from urllib.parse import quote
+from flask import current_app, abort, redirect, send_from_directory
+
+try:
+    import fcntl  # 文件锁，多进程部署下串行化同一续传会话的写入
+except ImportError:
+    fcntl = None
+
+# 分块读写大小（字节）
+CHUNK_SIZE = 64 * 1024
+# 内容寻址文件名：<sha256>.<扩展名>，以及由其派生的文件（如缩略图 <sha256>.<扩展名>.thumb.jpg）
+CONTENT_NAME_RE = re.compile(r'^[0-9a-f]{64}(\.[a-z0-9]+)+$')
+# 内容寻址文件内容不会变化，可长期缓存
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# 对外地址前缀
+URL_PREFIX = '/uploads/'
+# 可对外提供的文件名（不含目录，不以点开头）
+NAME_RE = re.compile(r'^[0-9a-zA-Z][^/]*$')
+
+
+class FileTooLarge(ValueError):
+    """上传文件超过大小限制"""
+
+
+def upload_root():
+    return current_app.config['UPLOAD_FOLDER']
+
+
+def temp_dir():
+    """上传临时目录，与正式文件位于同一文件系统，保证改名是原子操作"""
+    path = os.path.join(upload_root(), 'tmp')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def is_content_addressed(name):
+    return bool(CONTENT_NAME_RE.match(os.path.basename(name)))
+
+
+def shard_relpath(name):
+    """两级分片的相对路径 ab/cd/<name>，避免单个目录下文件过多"""
+    return f'{name[:2]}/{name[2:4]}/{name}'
+
+
+def blob_path(name):
+    """文件在磁盘上的路径（分片目录）"""
+    return os.path.join(upload_root(), *shard_relpath(name).split('/'))
+
+
+def file_url(name):
+    return URL_PREFIX + shard_relpath(name)
+
+
+def locate(filename):
+    """把 /uploads/ 之后的路径解析为上传目录下实际存在的相对路径
+
+    只接受分片路径与旧版平铺文件名，tmp、exports 等内部目录不可访问；
+    平铺文件名在迁移后回退到对应的分片位置，已下发的旧地址仍然有效。
+    不存在时返回 None。
+    """
+    root = upload_root()
+    name = filename.rsplit('/', 1)[-1]
+    if not NAME_RE.match(name):
+        return None
+    if filename == shard_relpath(name):
+        candidates = [filename]
+    elif filename == name:
+        candidates = [filename, shard_relpath(name)]
+    else:
+        return None
+    for relpath in candidates:
+        if os.path.isfile(os.path.join(root, *relpath.split('/'))):
+            return relpath
+    return None
+
+
+def _apply_cache_headers(response, relpath):
+    """内容寻址文件长期缓存并以内容哈希作为 ETag，其他文件按 UPLOAD_CACHE_MAX_AGE 缓存"""
+    response.cache_control.no_cache = None
+    response.cache_control.public = True
+    if is_content_addressed(relpath):
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.max_age = current_app.config['UPLOAD_CACHE_MAX_AGE']
+
+
+def serve_upload(filename):
+    """提供 /uploads 下的文件
+
+    UPLOAD_SERVE_MODE 为 x-accel 时只返回 X-Accel-Redirect，由 nginx 发送文件；
+    为 x-sendfile 时返回 X-Sendfile（Apache/lighttpd）；
+    默认由应用发送，支持 Range 断点续传与 ETag/If-None-Match 条件请求。
+    """
+    relpath = locate(filename)
+    if relpath is None:
+        return _missing_thumbnail(filename) or abort(404)
+
+    mode = current_app.config['UPLOAD_SERVE_MODE']
+    if mode == 'x-accel':
+        response = current_app.response_class(
+            mimetype=mimetypes.guess_type(relpath)[0] or 'application/octet-stream'
+        )
+        response.headers['X-Accel-Redirect'] = current_app.config['UPLOAD_ACCEL_PREFIX'] + quote(relpath)
+    else:
+        name = os.path.basename(relpath)
+        # 内容寻址文件的哈希即是强 ETag，多台服务器与备份恢复后保持一致
+        etag = name.split('.', 1)[0] if is_content_addressed(relpath) else True
+        # x-sendfile 模式下 USE_X_SENDFILE 已开启，send_file 只输出 X-Sendfile 头
+        response = send_from_directory(upload_root(), relpath, etag=etag, conditional=True)
+
+    _apply_cache_headers(response, relpath)
+    return response
+
+
+def _missing_thumbnail(filename):
+    """缩略图尚未生成时重定向到原文件并重新提交生成任务，不是缩略图或原文件也不存在时返回 None"""
+    from app.utils.thumbnails import THUMBNAIL_SUFFIX, schedule_thumbnail
+
+    if not filename.endswith(THUMBNAIL_SUFFIX):
+        return None
+    relpath = locate(filename[:-len(THUMBNAIL_SUFFIX)])
+    if relpath is None:
+        return None
+    try:
+        schedule_thumbnail(os.path.join(upload_root(), *relpath.split('/')))
+    except Exception as e:
+        current_app.logger.warning('提交缩略图任务失败: %s', e)
+    response = redirect(URL_PREFIX + relpath)
+    # 缩略图生成后应改为返回缩略图，重定向不缓存
+    response.cache_control.no_store = True
+    return response
+
+
+def local_path(url):
+    """把 /uploads/... 地址解析为磁盘路径，文件不存在时返回 None"""
+    if not isinstance(url, str) or not url.startswith(URL_PREFIX):
+        return None
+    relpath = locate(url[len(URL_PREFIX):])
+    if relpath is None:
+        return None
+    return os.path.join(upload_root(), *relpath.split('/'))
+
+
+def evidence_entries(paths, originals=None):
+    """佐证材料列表：每项包含文件地址、缩略图地址与保留的原图地址（没有时为 None）
+
+    缩略图地址由内容寻址文件名直接推出，不逐个检查文件；不支持生成缩略图的文件为 None。
+    缩略图尚未生成时，该地址重定向到原文件（见 serve_upload）。
+    """
+    from app.utils.thumbnails import THUMBNAIL_SUFFIX, can_thumbnail
+
+    entries = []
+    for path in paths or []:
+        thumbnail = None
+        if isinstance(path, str) and path.startswith(URL_PREFIX):
+            name = path.rsplit('/', 1)[-1]
+            if is_content_addressed(name) and can_thumbnail(name):
+                thumbnail = file_url(name) + THUMBNAIL_SUFFIX
+        entries.append({'file_path': path, 'thumbnail': thumbnail, 'original': (originals or {}).get(path)})
+    return entries
+
+
+def clean_original_files(originals, evidence_files):
+    """只保留属于当前佐证材料、且指向内容寻址上传文件的原图映射"""
+    if not isinstance(originals, dict):
+        return {}
+    evidence = {path for path in evidence_files or [] if isinstance(path, str)}
+    return {
+        path: original for path, original in originals.items()
+        if path in evidence and isinstance(original, str) and original.startswith(URL_PREFIX)
+        and is_content_addressed(original)
+    }
+
+
+def store_stream(stream, extension, max_size):
+    """把上传流分块写入临时文件并同时计算 SHA-256，再按内容哈希存放
+
+    内容相同的文件只保存一份。返回 (文件名, 文件大小, 是否已存在)。
+    超过 max_size 时抛出 FileTooLarge，临时文件随即删除。
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=temp_dir(), prefix='upload-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise FileTooLarge(size)
+                digest.update(chunk)
+                out.write(chunk)
+
+        name, deduplicated = commit_file(temp_path, digest.hexdigest(), extension)
+        return name, size, deduplicated
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def commit_file(temp_path, sha256, extension):
+    """把已写完的临时文件按内容哈希放入分片目录，返回 (文件名, 是否已存在)"""
+    name = f'{sha256}.{extension}'
+    path = blob_path(name)
+    try:
+        # 已存在时刷新修改时间，清理未引用文件时按宽限期保留刚被重新上传的文件
+        os.utime(path)
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+        return name, False
+    os.remove(temp_path)
+    return name, True
+
+
+def file_sha256(path):
+    """分块计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ---- 断点续传 ----
+
+UPLOAD_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class UploadSessionError(ValueError):
+    """断点续传会话操作无效"""
+
+
+class SessionNotFound(UploadSessionError):
+    """续传会话不存在、已完成或已过期"""
+
+
+class OffsetMismatch(UploadSessionError):
+    """分块偏移与服务端已提交的长度不一致"""
+
+    def __init__(self, offset):
+        super().__init__(offset)
+        self.offset = offset
+
+
+def session_dir():
+    """续传会话目录：<upload_id>.json 保存会话信息，<upload_id>.part 保存已接收的数据"""
+    path = os.path.join(temp_dir(), 'sessions')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _session_files(upload_id):
+    directory = session_dir()
+    return os.path.join(directory, f'{upload_id}.json'), os.path.join(directory, f'{upload_id}.part')
+
+
+# 无 fcntl 的平台（Windows 开发环境）退化为进程内锁
+_thread_locks_guard = threading.Lock()
+_thread_locks = {}
+
+
+@contextmanager
+def _exclusive(f, blocking=True):
+    """对已打开的会话数据文件加独占锁，获取失败（非阻塞）时返回 False"""
+    if fcntl is not None:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        return
+
+    with _thread_locks_guard:
+        lock = _thread_locks.setdefault(f.name, threading.Lock())
+    if not lock.acquire(blocking):
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        lock.release()
+        with _thread_locks_guard:
+            _thread_locks.pop(f.name, None)
+
+
+def _is_current(f, path):
+    """加锁期间文件未被完成或清理（路径仍指向同一个文件）"""
+    try:
+        return os.path.samestat(os.fstat(f.fileno()), os.stat(path))
+    except FileNotFoundError:
+        return False
+
+
+@contextmanager
+def _locked_session(upload_id):
+    """以独占锁打开会话数据文件，偏移检查、写入、截断与完成都在锁内进行
+
+    同一会话的并发请求依次执行；等锁期间会话已被完成或清理时抛出 SessionNotFound。
+    """
+    meta_path, part_path = _session_files(upload_id)
+    try:
+        f = open(part_path, 'r+b')
+    except FileNotFoundError:
+        raise SessionNotFound('上传会话不存在或已过期')
+    with f, _exclusive(f):
+        if not _is_current(f, part_path) or not os.path.exists(meta_path):
+            raise SessionNotFound('上传会话不存在或已过期')
+        yield f
+
+
+def cleanup_upload_sessions():
+    """删除超过 RESUMABLE_UPLOAD_EXPIRY 秒未更新的续传会话，正在写入的会话跳过"""
+    cutoff = time.time() - current_app.config['RESUMABLE_UPLOAD_EXPIRY']
+    directory = session_dir()
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        upload_id, extension = os.path.splitext(name)
+        try:
+            if os.path.getmtime(path) >= cutoff:
+                continue
+            if extension != '.part':
+                # 元数据文件随 .part 一起删除；缺少 .part 的残留元数据直接删除
+                if not os.path.exists(os.path.join(directory, upload_id + '.part')):
+                    os.remove(path)
+                continue
+            with open(path, 'r+b') as f, _exclusive(f, blocking=False) as locked:
+                if not locked or not _is_current(f, path) or os.fstat(f.fileno()).st_mtime >= cutoff:
+                    continue
+                meta_path, _ = _session_files(upload_id)
+                os.remove(path)
+                if os.path.exists(meta_path):
+                    os.remove(meta_path)
+        except FileNotFoundError:
+            # 其他请求已完成或清理了该会话
+            continue
+
+
+def create_upload_session(user_id, filename, extension, size, sha256=None):
+    """创建续传会话"""
+    if sha256 is not None and not SHA256_RE.match(sha256):
+        raise UploadSessionError('无效的 SHA-256 校验值')
+    session = {
+        'upload_id': uuid.uuid4().hex,
+        'user_id': user_id,
+        'filename': filename,
+        'extension': extension,
+        'size': size,
+        'sha256': sha256,
+        'created_at': time.time()
+    }
+    meta_path, part_path = _session_files(session['upload_id'])
+    open(part_path, 'wb').close()
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(session, f)
+    return session
+
+
+def load_upload_session(upload_id):
+    """读取续传会话，附带当前已提交的偏移；不存在时返回 None"""
+    if not UPLOAD_ID_RE.match(upload_id):
+        return None
+    meta_path, part_path = _session_files(upload_id)
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            session = json.load(f)
+        session['offset'] = os.path.getsize(part_path)
+    except FileNotFoundError:
+        # 会话已完成、已清理，或正在被其他请求完成
+        return None
+    return session
+
+
+def append_chunk(session, offset, stream):
+    """把请求体分块追加到会话文件，返回新的偏移
+
+    offset 必须等于已提交的长度，否则抛出 OffsetMismatch 并告知正确偏移。
+    写入中断或超过声明大小时截断回本块开始前的长度，已提交的数据保持完整；
+    整个过程持有会话锁，并发的同一会话请求不会交错写入或截掉彼此已确认的数据。
+    """
+    with _locked_session(session['upload_id']) as f:
+        f.seek(0, os.SEEK_END)
+        committed = f.tell()
+        if offset != committed:
+            raise OffsetMismatch(committed)
+        try:
+            written = committed
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > session['size']:
+                    raise UploadSessionError('数据超过声明的文件大小')
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+            return written
+        except BaseException:
+            f.truncate(committed)
+            raise
+
+
+def complete_upload_session(session, sha256=None):
+    """校验长度与 SHA-256 后把文件放入存储，返回 (文件名, 文件大小, 是否已存在)
+
+    在会话锁内以磁盘上的实际长度校验；校验失败时删除会话，客户端需重新上传。
+    """
+    meta_path, part_path = _session_files(session['upload_id'])
+    with _locked_session(session['upload_id']) as f:
+        offset = os.fstat(f.fileno()).st_size
+        if offset != session['size']:
+            raise OffsetMismatch(offset)
+
+        actual = file_sha256(part_path)
+        expected = sha256 or session.get('sha256')
+        if expected and expected != actual:
+            os.remove(part_path)
+            os.remove(meta_path)
+            raise UploadSessionError('文件校验失败，请重新上传')
+
+        name, deduplicated = commit_file(part_path, actual, session['extension'])
+        os.remove(meta_path)
+        return name, session['size'], deduplicated
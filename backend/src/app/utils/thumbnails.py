@@ -0,0 +1,87 @@
+import os
+import threading
+from flask import current_app
+from PIL import Image, ImageOps
+from app.utils.workers import get_pool
+
+try:
+    import fitz  # PyMuPDF，可选依赖，用于渲染 PDF 首页
+except ImportError:
+    fitz = None
+
+# 缩略图与原文件放在同一目录：<原文件名>.thumb.jpg
+THUMBNAIL_SUFFIX = '.thumb.jpg'
+THUMBNAIL_POOL = 'thumbnail'
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp'}
+
+_pending_lock = threading.Lock()
+_pending = set()
+
+
+def thumbnail_path(source):
+    return source + THUMBNAIL_SUFFIX
+
+
+def can_thumbnail(source):
+    extension = source.rsplit('.', 1)[-1].lower()
+    return extension in IMAGE_EXTENSIONS or (extension == 'pdf' and fitz is not None)
+
+
+def _open_pdf_page(source, max_size):
+    """把 PDF 首页渲染为图片，缩放到长边约为 max_size"""
+    with fitz.open(source) as document:
+        page = document[0]
+        zoom = max_size / max(page.rect.width, page.rect.height)
+        pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        return Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+
+
+def render_thumbnail(source, max_size, quality=80):
+    """生成缩略图（在进程池中执行，不依赖应用上下文），返回是否生成成功"""
+    target = thumbnail_path(source)
+    if os.path.exists(target):
+        return True
+    if source.lower().endswith('.pdf'):
+        if fitz is None:
+            return False
+        image = _open_pdf_page(source, max_size)
+    else:
+        image = Image.open(source)
+        # JPEG 可按目标尺寸直接降采样解码，减少大图的解码开销
+        image.draft('RGB', (max_size, max_size))
+        image = ImageOps.exif_transpose(image)
+
+    image.thumbnail((max_size, max_size))
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    # 先写临时文件再改名，读取方不会看到写了一半的缩略图
+    partial = f'{target}.{os.getpid()}.part'
+    image.save(partial, 'JPEG', quality=quality, optimize=True)
+    os.replace(partial, target)
+    return True
+
+
+def schedule_thumbnail(source):
+    """提交缩略图任务到进程池，排队任务超过 THUMBNAIL_MAX_PENDING 时跳过"""
+    if not can_thumbnail(source) or os.path.exists(thumbnail_path(source)):
+        return False
+    with _pending_lock:
+        if source in _pending or len(_pending) >= current_app.config['THUMBNAIL_MAX_PENDING']:
+            return False
+        _pending.add(source)
+    # 回调在进程池的管理线程中执行，没有应用上下文，先取出 logger
+    logger = current_app.logger
+
+    def done(future):
+        with _pending_lock:
+            _pending.discard(source)
+        if future is not None and not future.cancelled() and future.exception() is not None:
+            logger.error('生成缩略图失败: %s', source, exc_info=future.exception())
+
+    try:
+        pool = get_pool(THUMBNAIL_POOL, current_app.config['THUMBNAIL_WORKERS'])
+        pool.submit(render_thumbnail, source, current_app.config['THUMBNAIL_SIZE']).add_done_callback(done)
+    except Exception:
+        done(None)
+        raise
+    return True
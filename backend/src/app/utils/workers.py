@@ -0,0 +1,35 @@
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+_lock = threading.Lock()
+# 名称 -> ProcessPoolExecutor
+_pools = {}
+
+
+def get_pool(name, max_workers):
+    """按名称获取（首次调用时创建）本进程内共享的进程池
+
+    子进程使用 spawn 方式启动，不继承父进程的数据库连接，
+    由任务函数自行创建应用与连接。
+    """
+    with _lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _pools[name] = pool
+        return pool
+
+
+@atexit.register
+def shutdown_pools():
+    """进程退出时关闭全部进程池"""
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
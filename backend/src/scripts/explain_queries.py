@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+列表接口执行计划检查脚本
+
+通过测试客户端依次请求各列表接口，捕获接口实际执行的 SELECT 语句，
+在 PostgreSQL 上逐条执行 EXPLAIN，报告仍然走顺序扫描（Seq Scan）的表。
+
+用法：
+    uv run explain_queries               # 按真实统计信息生成执行计划
+    uv run explain_queries --force-index # 关闭 enable_seqscan，检查索引是否可用
+
+数据量很小时规划器本就倾向顺序扫描，此时可使用 --force-index 验证索引能否被选中。
+"""
+
+import argparse
+import os
+import re
+import sys
+
+## 保障包导入：将 src 目录加入搜索路径（scripts 的上一级）
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from app import create_app, db
+from app.models import User
+
+# 需要检查的表
+WATCHED_TABLES = ('achievements', 'logs', 'users')
+
+# (接口, 请求角色)
+ENDPOINTS = [
+    ('/api/admin/achievements', 'admin'),
+    ('/api/admin/achievements?status=pending', 'admin'),
+    ('/api/admin/users', 'admin'),
+    ('/api/leader/pending-achievements', 'team_leader'),
+    ('/api/leader/achievements', 'team_leader'),
+    ('/api/leader/audit-logs', 'team_leader'),
+    ('/api/student/achievements', 'student'),
+    ('/api/public/achievements', None),
+]
+
+SEQ_SCAN_PATTERN = re.compile(r'Seq Scan on (\w+)')
+
+
+def capture_queries(app, url, user):
+    """请求接口并返回其执行的 SELECT 语句及参数"""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            captured.append((statement, parameters))
+
+    headers = {}
+    if user is not None:
+        headers['Authorization'] = f'Bearer {create_access_token(identity=user.user_id)}'
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = app.test_client().get(url, headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return response.status_code, captured
+
+
+def explain(statement, parameters, force_index):
+    """返回语句的执行计划文本"""
+    with db.engine.connect() as conn:
+        if force_index:
+            conn.exec_driver_sql('SET enable_seqscan = off')
+        rows = conn.exec_driver_sql(f'EXPLAIN {statement}', parameters).all()
+        conn.rollback()
+    return '\n'.join(row[0] for row in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='检查列表接口是否仍然顺序扫描')
+    parser.add_argument('--force-index', action='store_true', help='关闭 enable_seqscan 后再生成执行计划')
+    parser.add_argument('--verbose', action='store_true', help='输出完整执行计划')
+    args = parser.parse_args()
+
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+    app.config['SQLALCHEMY_ECHO'] = False
+
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            print('执行计划检查仅支持 PostgreSQL')
+            return 1
+
+        users = {role: User.query.filter_by(role=role, is_active=True).first()
+                 for role in ('admin', 'team_leader', 'student')}
+
+        failures = 0
+        for url, role in ENDPOINTS:
+            user = users.get(role) if role else None
+            if role and user is None:
+                print(f'[跳过] {url}：数据库中没有 {role} 用户')
+                continue
+
+            status_code, queries = capture_queries(app, url, user)
+            print(f'[{status_code}] {url}')
+            for statement, parameters in queries:
+                plan = explain(statement, parameters, args.force_index)
+                seq_tables = sorted({t for t in SEQ_SCAN_PATTERN.findall(plan) if t in WATCHED_TABLES})
+                summary = ' '.join(statement.split())[:100]
+                if seq_tables:
+                    failures += 1
+                    print(f'  Seq Scan {", ".join(seq_tables)} <- {summary}')
+                else:
+                    print(f'  OK <- {summary}')
+                if args.verbose:
+                    print('    ' + plan.replace('\n', '\n    '))
+
+        print(f'共 {failures} 条语句存在顺序扫描')
+        return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,122 +9,51 @@ Excel 期望格式：
 《学生.xlsx》工作表名：信息表
 表头：学号, 姓名, 警号, 年级, 区队, 区队(全称)
 《队长.xlsx》表头：姓名, 职务（用户名将自动生成为 leader001…）
+
+Excel 以只读模式逐行读取；账号按用户名批量 upsert，重复执行只写入有变化的行。
+用法：
+    uv run init_db          # 建立缺失的表并导入/更新账号
+    uv run init_db --reset  # 删除全部表后重新初始化（谨慎使用）
 """
 
 from datetime import datetime
+import argparse
 import os
 import sys
-from typing import List, Dict, Tuple
-from werkzeug.security import generate_password_hash
 
 ## 保障包导入：将 src 目录加入搜索路径（scripts 的上一级）
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from flask_migrate import stamp
 from app import create_app, db
 from app.models import User, Class, Achievement, AuditLog
 from app.models.system_config import SystemConfig
-try:
-    from openpyxl import load_workbook
-except ImportError:
-    print("缺少 openpyxl 依赖，请先安装：pip3 install openpyxl")
-    raise
-
-COLLEGE_DEFAULT = '信息网络安全学院'
-MAJOR_DEFAULT = None  # 无专业字段时置空
-
-
-def load_students_from_excel(file_path: str) -> Tuple[List[Dict], Dict[str, Dict]]:
-    """读取学生 Excel，返回学生列表和班级字典（按全称聚合）
-    学生项：{'username','name','grade','team_short','team_full'}
-    班级项：{'class_name','college','grade','major'}
-    """
-    wb = load_workbook(file_path, data_only=True)
-    ws = wb.active
-    # 表头定位
-    headers = [str(c.value).strip() if c.value is not None else '' for c in next(ws.iter_rows(min_row=1, max_row=1))]
-    # 简单映射
-    try:
-        idx_sid = headers.index('学号')
-        idx_name = headers.index('姓名')
-        idx_grade = headers.index('年级')
-        # 两个“区队”列：短称与全称
-        idx_team_short = headers.index('区队')
-        # 找到第二个“区队”作为全称
-        idx_team_full = headers.index('区队', idx_team_short + 1)
-    except ValueError:
-        raise RuntimeError('《学生.xlsx》表头不符合预期，请确保包含：学号, 姓名, 年级, 区队(两列)')
-
-    students: List[Dict] = []
-    classes_map: Dict[str, Dict] = {}
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        sid = str(row[idx_sid]).strip() if row[idx_sid] is not None else ''
-        name = str(row[idx_name]).strip() if row[idx_name] is not None else ''
-        grade_raw = str(row[idx_grade]).strip() if row[idx_grade] is not None else ''
-        team_short = str(row[idx_team_short]).strip() if row[idx_team_short] is not None else ''
-        team_full = str(row[idx_team_full]).strip() if row[idx_team_full] is not None else ''
-        if not sid or not name:
-            continue
-        # 年级标准化：如 "22" -> "2022"
-        grade = grade_raw
-        if grade_raw and len(grade_raw) == 2 and grade_raw.isdigit():
-            grade = '20' + grade_raw
-
-        students.append({
-            'username': sid,
-            'name': name,
-            'grade': grade,
-            'team_short': team_short,
-            'team_full': team_full or team_short,
-        })
-
-        class_name = team_full or team_short or '未分配区队'
-        if class_name not in classes_map:
-            classes_map[class_name] = {
-                'class_name': class_name,
-                'college': COLLEGE_DEFAULT,
-                'grade': grade,
-                'major': MAJOR_DEFAULT,
-            }
-    return students, classes_map
-
-
-def load_leaders_from_excel(file_path: str) -> List[Dict]:
-    """读取队长 Excel，返回队长列表（用户名自动生成为 leader001…）
-    队长项：{'username','name','duty'}
-    """
-    wb = load_workbook(file_path, data_only=True)
-    ws = wb.active
-    headers = [str(c.value).strip() if c.value is not None else '' for c in next(ws.iter_rows(min_row=1, max_row=1))]
-    try:
-        idx_name = headers.index('姓名')
-        idx_duty = headers.index('职务')
-    except ValueError:
-        raise RuntimeError('《队长.xlsx》表头不符合预期，请确保包含：姓名, 职务')
-
-    leaders: List[Dict] = []
-    seq = 1
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        name = str(row[idx_name]).strip() if row[idx_name] is not None else ''
-        duty = str(row[idx_duty]).strip() if row[idx_duty] is not None else ''
-        if not name:
-            continue
-        username = f'leader{seq:03d}'
-        seq += 1
-        leaders.append({'username': username, 'name': name, 'duty': duty})
-    return leaders
+from app.utils.passwords import hash_password
+from app.utils.roster import load_students, load_leaders, ensure_classes, upsert_users, class_data as student_class
+
 
 def main():
     """初始化数据库"""
+    parser = argparse.ArgumentParser(description='初始化数据库并导入账号')
+    parser.add_argument('--reset', action='store_true', help='删除全部表后重新初始化')
+    args = parser.parse_args()
+
     app = create_app('development')
     
     with app.app_context():
-        # 删除所有表（谨慎使用）
-        print("正在删除现有表...")
-        db.drop_all()
+        fresh = not db.inspect(db.engine).has_table(User.__tablename__)
+        if args.reset:
+            # 删除所有表（谨慎使用）
+            print("正在删除现有表...")
+            db.drop_all()
+            fresh = True
         
-        # 创建所有表
+        # 创建所有表（已存在的表保持不变）
         print("正在创建数据库表...")
         db.create_all()
+        if fresh:
+            # 新建的库已包含全部表结构与索引，直接将迁移版本标记为最新
+            stamp()
         
         # 创建初始数据
         print("正在创建初始数据...")
@@ -132,6 +61,7 @@ def main():
         
         print("数据库初始化完成！")
 
+
 def create_initial_data():
     """创建初始数据：优先从 Excel 导入，缺失时回退到示例数据"""
 
@@ -146,50 +76,41 @@ def create_initial_data():
 
     if os.path.exists(students_excel) and os.path.exists(leaders_excel):
         print(f"检测到 Excel 文件，开始导入：\n学生 -> {students_excel}\n队长 -> {leaders_excel}")
-        # 读取 Excel
-        students_list, class_map = load_students_from_excel(students_excel)
-        leaders_list = load_leaders_from_excel(leaders_excel)
-
-        # 创建班级
-        for class_name, class_data in class_map.items():
-            class_obj = Class(**class_data)
-            db.session.add(class_obj)
-            classes.append(class_obj)
-        db.session.flush()  # 获取 class_id
-
-        # 预计算初始化密码哈希，避免重复计算耗时
-        admin_pwd_hash = generate_password_hash('admin123')
-        leader_pwd_hash = generate_password_hash('leader123')
+        # 读取 Excel（只读模式逐行读取）
+        students_list, class_map = load_students(students_excel)
+        leaders_list = load_leaders(leaders_excel)
+
+        # 补充缺失的班级
+        name_to_id, new_classes = ensure_classes(class_map)
+
+        # 预计算初始化密码哈希，避免重复计算耗时（只用于新建账号）
+        admin_pwd_hash = hash_password('admin123')
+        leader_pwd_hash = hash_password('leader123')
         default_pwd = SystemConfig.get_config('default_password', 'student123')
-        default_pwd_hash = generate_password_hash(default_pwd)
-
-        # 创建管理员
-        admin = User(username='admin', name='系统管理员', role='admin')
-        admin.password_hash = admin_pwd_hash
-        db.session.add(admin)
-
-        # 创建队长（不绑定班级）
-        for item in leaders_list:
-            leader = User(username=item['username'], name=item['name'], role='team_leader')
-            leader.password_hash = leader_pwd_hash
-            db.session.add(leader)
-            leaders.append(leader)
-        db.session.flush()
-
-        # 创建学生
-        # 建立班级名到ID的映射
-        name_to_id = {c.class_name: c.class_id for c in classes}
-        for s in students_list:
-            class_id = name_to_id.get(s['team_full']) or name_to_id.get(s['team_short'])
-            student = User(
-                username=s['username'],
-                name=s['name'],
-                role='student',
-                class_id=class_id
-            )
-            student.password_hash = default_pwd_hash
-            db.session.add(student)
-            students.append(student)
+        default_pwd_hash = hash_password(default_pwd)
+
+        # 管理员与队长（不绑定班级）
+        staff_rows = [{'username': 'admin', 'name': '系统管理员', 'role': 'admin',
+                       'password_hash': admin_pwd_hash, 'class_id': None}]
+        staff_rows += [
+            {'username': item['username'], 'name': item['name'], 'role': 'team_leader',
+             'password_hash': leader_pwd_hash, 'class_id': None}
+            for item in leaders_list
+        ]
+
+        # 学生
+        student_rows = [
+            {
+                'username': s['username'],
+                'name': s['name'],
+                'role': 'student',
+                'password_hash': default_pwd_hash,
+                'class_id': name_to_id.get(student_class(s)['class_name']),
+            }
+            for s in students_list
+        ]
+
+        changed = upsert_users(staff_rows) + upsert_users(student_rows)
 
         # 可选：不自动创建示例成果，初始化更为干净
         db.session.commit()
@@ -197,14 +118,20 @@ def create_initial_data():
         print("正在初始化系统配置...")
         SystemConfig.init_default_configs()
 
-        print(f"创建了 {len(classes)} 个班级（来自学生表）")
-        print("创建了 1 个管理员账户: admin/admin123")
-        print(f"创建了 {len(leaders)} 个队长账户: leader001…/leader123")
-        print(f"创建了 {len(students)} 个学生账户: 学号/{default_pwd}")
+        print(f"班级 {len(class_map)} 个（来自学生表），新增 {new_classes} 个")
+        print(f"账号 {len(staff_rows) + len(student_rows)} 个，新增或变更 {changed} 个")
+        print("管理员账户: admin/admin123")
+        print(f"队长 {len(leaders_list)} 个: leader001…/leader123")
+        print(f"学生 {len(student_rows)} 个: 学号/{default_pwd}")
         print("系统配置已初始化")
         return
 
     # ===== 无 Excel 文件时，使用原示例数据 =====
+    if db.session.query(User.user_id).first() is not None:
+        # 示例数据不做 upsert，已有账号时跳过，避免重复执行时产生重复数据
+        print("未检测到 Excel 文件，数据库中已有账号，跳过示例数据（如需重建请使用 --reset）。")
+        SystemConfig.init_default_configs()
+        return
     print("未检测到 Excel 文件，使用示例数据初始化。")
     classes_data = [
         {'class_name': '2021级侦查学1班', 'college': '侦查学院', 'grade': '2021', 'major': '侦查学'},
@@ -221,9 +148,9 @@ def create_initial_data():
     db.session.flush()
 
     # 预计算示例数据密码哈希
-    admin_pwd_hash = generate_password_hash('admin123')
-    leader_pwd_hash = generate_password_hash('leader123')
-    student_pwd_hash = generate_password_hash('student123')
+    admin_pwd_hash = hash_password('admin123')
+    leader_pwd_hash = hash_password('leader123')
+    student_pwd_hash = hash_password('student123')
 
     admin = User(username='admin', name='系统管理员', role='admin')
     admin.password_hash = admin_pwd_hash
@@ -259,6 +186,7 @@ def create_initial_data():
         student.password_hash = student_pwd_hash
         db.session.add(student)
         students.append(student)
+    db.session.flush()  # 获取学生 user_id，供示例成果引用
 
     # 示例成果：包括各种状态的示例
     achievements_data = [
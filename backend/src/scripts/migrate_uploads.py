@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+上传文件目录迁移脚本
+
+把 UPLOAD_FOLDER 下平铺存放的文件移动到两级分片目录（ab/cd/<文件名>），
+并分批把 achievements.evidence_files 中的 /uploads/<文件名> 改写为分片地址。
+
+用法：
+    uv run migrate_uploads            # 执行迁移
+    uv run migrate_uploads --dry-run  # 只统计，不做修改
+    uv run migrate_uploads --gc       # 迁移后删除未被任何成果引用的内容寻址文件
+
+迁移可重复执行；迁移期间旧地址由 /uploads 路由回退到分片位置，不影响访问。
+清理只删除修改时间早于宽限期（--gc-grace-hours）的文件，刚上传尚未提交到成果的文件不受影响。
+"""
+
+import argparse
+import os
+import sys
+import time
+
+## 保障包导入：将 src 目录加入搜索路径（scripts 的上一级）
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.models import Achievement
+from app.utils.storage import URL_PREFIX, NAME_RE, CONTENT_NAME_RE, blob_path, file_url, shard_relpath
+from app.utils.thumbnails import THUMBNAIL_SUFFIX
+
+BATCH_SIZE = 500
+
+
+def move_files(root, dry_run):
+    """移动平铺文件，返回 (移动数, 重复删除数)"""
+    moved = duplicates = 0
+    for name in os.listdir(root):
+        source = os.path.join(root, name)
+        if not NAME_RE.match(name) or not os.path.isfile(source):
+            continue
+        target = blob_path(name)
+        if dry_run:
+            moved += 1
+            continue
+        if os.path.exists(target):
+            # 内容寻址文件同名即同内容，保留已有的一份
+            os.remove(source)
+            duplicates += 1
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(source, target)
+        moved += 1
+    return moved, duplicates
+
+
+def rewrite_path(path):
+    """把平铺地址改写为分片地址，其他地址原样返回"""
+    if not isinstance(path, str) or not path.startswith(URL_PREFIX):
+        return path
+    name = path[len(URL_PREFIX):]
+    if '/' in name or not NAME_RE.match(name):
+        return path
+    return file_url(name)
+
+
+def rewrite_evidence_paths(dry_run):
+    """按主键分批改写 evidence_files，每批提交一次，返回改写的成果数"""
+    updated = 0
+    last_id = ''
+    while True:
+        rows = db.session.query(Achievement.achievement_id, Achievement.evidence_files)\
+            .filter(Achievement.achievement_id > last_id)\
+            .order_by(Achievement.achievement_id)\
+            .limit(BATCH_SIZE).all()
+        if not rows:
+            break
+        last_id = rows[-1].achievement_id
+
+        changes = []
+        for achievement_id, evidence_files in rows:
+            if not evidence_files:
+                continue
+            rewritten = [rewrite_path(path) for path in evidence_files]
+            if rewritten != evidence_files:
+                changes.append({'achievement_id': achievement_id, 'evidence_files': rewritten})
+
+        if changes and not dry_run:
+            # 按主键批量更新，只改 evidence_files，不影响统计汇总
+            db.session.execute(db.update(Achievement), changes)
+            db.session.commit()
+        updated += len(changes)
+        print(f"  已处理至 {last_id}，本批改写 {len(changes)} 条")
+    return updated
+
+
+def referenced_names():
+    """按主键分批读取全部成果的佐证材料与保留的原图，返回被引用的文件名集合"""
+    names = set()
+    last_id = ''
+    while True:
+        rows = db.session.query(Achievement.achievement_id, Achievement.evidence_files, Achievement.original_files)\
+            .filter(Achievement.achievement_id > last_id)\
+            .order_by(Achievement.achievement_id)\
+            .limit(BATCH_SIZE).all()
+        if not rows:
+            break
+        last_id = rows[-1].achievement_id
+        for _, evidence_files, original_files in rows:
+            for path in [*(evidence_files or []), *(original_files or {}).values()]:
+                if isinstance(path, str) and path.startswith(URL_PREFIX):
+                    names.add(path.rsplit('/', 1)[-1])
+    return names
+
+
+def collect_garbage(root, grace_seconds, dry_run):
+    """删除分片目录中未被任何成果引用、且超过宽限期未修改的内容寻址文件（连同缩略图），返回删除数"""
+    referenced = referenced_names()
+    cutoff = time.time() - grace_seconds
+    removed = 0
+    for first in sorted(os.listdir(root)):
+        # 只扫描两级分片目录，tmp、exports 等内部目录不在其中
+        first_dir = os.path.join(root, first)
+        if len(first) != 2 or not os.path.isdir(first_dir):
+            continue
+        for second in os.listdir(first_dir):
+            shard = os.path.join(first_dir, second)
+            if len(second) != 2 or not os.path.isdir(shard):
+                continue
+            for name in os.listdir(shard):
+                # 缩略图随源文件一起保留或删除
+                source = name[:-len(THUMBNAIL_SUFFIX)] if name.endswith(THUMBNAIL_SUFFIX) else name
+                if not CONTENT_NAME_RE.match(name) or source in referenced:
+                    continue
+                path = os.path.join(shard, name)
+                try:
+                    if os.path.getmtime(path) >= cutoff:
+                        continue
+                    if not dry_run:
+                        os.remove(path)
+                except FileNotFoundError:
+                    continue
+                removed += 1
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='迁移上传文件到分片目录')
+    parser.add_argument('--dry-run', action='store_true', help='只统计，不做修改')
+    parser.add_argument('--gc', action='store_true', help='删除未被任何成果引用的内容寻址文件')
+    parser.add_argument('--gc-grace-hours', type=float, default=24, help='只删除超过该时长未修改的文件（小时）')
+    args = parser.parse_args()
+
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+    with app.app_context():
+        root = app.config['UPLOAD_FOLDER']
+        print(f"上传目录: {root}（分片示例: {shard_relpath('0123abcd.pdf')}）")
+
+        moved, duplicates = move_files(root, args.dry_run)
+        print(f"{'待移动' if args.dry_run else '已移动'}文件 {moved} 个，重复文件 {duplicates} 个")
+
+        updated = rewrite_evidence_paths(args.dry_run)
+        print(f"{'待改写' if args.dry_run else '已改写'}成果 {updated} 条")
+
+        if args.gc:
+            removed = collect_garbage(root, args.gc_grace_hours * 3600, args.dry_run)
+            print(f"{'待删除' if args.dry_run else '已删除'}未引用文件 {removed} 个")
+
+
+if __name__ == '__main__':
+    main()
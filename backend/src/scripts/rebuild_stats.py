@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+统计汇总表重建脚本
+
+按 achievements 表全量重算 achievement_stats 的计数，
+用于修正直接修改数据库等绕过增量维护导致的计数偏差。
+"""
+
+import os
+import sys
+
+## 保障包导入：将 src 目录加入搜索路径（scripts 的上一级）
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.models import AchievementStat
+
+
+def main():
+    """重建统计汇总表"""
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+
+    with app.app_context():
+        print("正在重建成果统计汇总表...")
+        AchievementStat.rebuild()
+        print(f"重建完成，共 {AchievementStat.query.count()} 条汇总记录")
+
+
+if __name__ == '__main__':
+    main()
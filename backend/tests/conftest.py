@@ -0,0 +1,62 @@
+from datetime import date
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import create_app, db
+from app.models import Achievement, Class, User
+from app.utils.auth import user_claims
+
+
+@pytest.fixture
+def app(tmp_path):
+    """基于 SQLite 内存库的测试应用，上传目录指向临时目录"""
+    app = create_app('testing')
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_class(name='一班'):
+    cls = Class(class_name=name, college='信息学院')
+    db.session.add(cls)
+    db.session.commit()
+    return cls
+
+
+def make_user(username, role='student', class_id=None):
+    # 直接写入哈希占位，测试不走登录流程
+    user = User(username=username, name=username, role=role, class_id=class_id, password_hash='-')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def make_achievement(leader, submitter=None, status='pending', **fields):
+    fields.setdefault('title', '成果')
+    fields.setdefault('type', 'paper')
+    fields.setdefault('level', 'school')
+    fields.setdefault('award_date', date(2024, 5, 1))
+    achievement = Achievement(
+        leader_id=leader.user_id,
+        submitter_id=(submitter or leader).user_id,
+        class_id=fields.pop('class_id', (submitter or leader).class_id),
+        status=status,
+        **fields,
+    )
+    db.session.add(achievement)
+    db.session.commit()
+    return achievement
+
+
+def auth_headers(user):
+    token = create_access_token(identity=user.user_id, additional_claims=user_claims(user))
+    return {'Authorization': f'Bearer {token}'}
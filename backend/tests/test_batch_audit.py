@@ -0,0 +1,51 @@
+from app import db
+from app.models import Achievement, AuditLog
+
+from .conftest import auth_headers, make_achievement, make_user
+
+
+def test_batch_audit_reports_each_item(client):
+    leader = make_user('leader', role='team_leader')
+    other = make_user('other', role='team_leader')
+    pending = make_achievement(leader)
+    rejected = make_achievement(leader)
+    audited = make_achievement(leader, status='approved')
+    foreign = make_achievement(other)
+
+    items = [
+        {'achievement_id': pending.achievement_id, 'action': 'unknown'},
+        {'achievement_id': pending.achievement_id, 'action': 'approve'},
+        {'achievement_id': pending.achievement_id, 'action': 'approve'},
+        {'achievement_id': rejected.achievement_id, 'action': 'reject'},
+        {'achievement_id': rejected.achievement_id, 'action': 'reject', 'comment': '材料不全'},
+        {'achievement_id': audited.achievement_id, 'action': 'approve'},
+        {'achievement_id': foreign.achievement_id, 'action': 'approve'},
+        'not-an-item',
+    ]
+    response = client.post('/api/leader/audit/batch', json={'items': items}, headers=auth_headers(leader))
+    assert response.status_code == 200
+    data = response.get_json()
+    results = data['results']
+
+    assert [r['index'] for r in results] == list(range(len(items)))
+    assert [r['success'] for r in results] == [False, True, False, False, True, False, False, False]
+    assert results[0]['message'] == '无效的审核操作'
+    # 第一项无效，重复项指向第一个有效条目
+    assert results[2]['message'] == '与第 1 项重复'
+    assert results[3]['message'] == '退回或拒绝必须填写审核意见'
+    assert results[5]['message'] == '该成果已被审核'
+    assert results[6]['message'] == '成果不存在或无权限审核'
+    assert results[7]['message'] == '条目格式无效'
+    assert (data['succeeded'], data['failed']) == (2, 6)
+
+    db.session.expire_all()
+    assert db.session.get(Achievement, pending.achievement_id).status == 'approved'
+    assert db.session.get(Achievement, rejected.achievement_id).status == 'rejected'
+    assert db.session.get(Achievement, foreign.achievement_id).status == 'pending'
+    assert AuditLog.query.count() == 2
+
+
+def test_batch_audit_rejects_non_list_items(client):
+    leader = make_user('leader', role='team_leader')
+    response = client.post('/api/leader/audit/batch', json={'items': 'abc'}, headers=auth_headers(leader))
+    assert response.status_code == 400
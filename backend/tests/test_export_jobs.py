@@ -0,0 +1,52 @@
+import os
+
+from app import db
+from app.models import ExportJob
+from app.utils.export import _update_job, execute_export_job, export_dir
+
+from .conftest import make_achievement, make_user
+
+
+def _job(user, status='pending', fmt='csv'):
+    job = ExportJob(created_by=user.user_id, format=fmt, filters={}, status=status)
+    db.session.add(job)
+    db.session.commit()
+    return job.job_id
+
+
+def _status(job_id):
+    db.session.expire_all()
+    return db.session.get(ExportJob, job_id)
+
+
+def test_claim_succeeds_only_once(app):
+    job_id = _job(make_user('admin', role='admin'))
+    assert _update_job(job_id, expected_status='pending', status='running') == 1
+    assert _update_job(job_id, expected_status='pending', status='running') == 0
+    assert _status(job_id).status == 'running'
+
+
+def test_execute_skips_job_that_is_not_pending(app):
+    job_id = _job(make_user('admin', role='admin'), status='running')
+    execute_export_job(job_id)
+    job = _status(job_id)
+    assert job.status == 'running'
+    assert job.started_at is None
+    assert os.listdir(export_dir()) == []
+
+
+def test_execute_writes_file_for_pending_job(app):
+    admin = make_user('admin', role='admin')
+    for _ in range(3):
+        make_achievement(admin, status='approved')
+    job_id = _job(admin)
+
+    execute_export_job(job_id)
+    job = _status(job_id)
+    assert job.status == 'done'
+    assert job.total_rows == job.processed_rows == 3
+    assert os.listdir(export_dir()) == [job.file_name]
+
+    # 已完成的任务不会被再次领取
+    execute_export_job(job_id)
+    assert _status(job_id).finished_at == job.finished_at
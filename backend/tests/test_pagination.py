@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import Achievement
+from app.utils.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_paginate
+
+from .conftest import auth_headers, make_achievement, make_user
+
+COLUMNS = (Achievement.created_at, Achievement.achievement_id)
+
+
+def test_cursor_roundtrip_restores_datetime(app):
+    created_at = datetime(2024, 3, 1, 8, 30, 15, 123456)
+    cursor = encode_cursor((created_at, 'abc'), 'prev')
+    assert '=' not in cursor
+    assert decode_cursor(cursor, COLUMNS) == ((created_at, 'abc'), 'prev')
+
+
+@pytest.mark.parametrize('cursor', [
+    'not-base64!!',
+    encode_cursor(('2024-03-01T00:00:00',), 'next'),  # 键数量不符
+    encode_cursor((datetime(2024, 3, 1), 'abc'), 'sideways'),  # 方向无效
+    encode_cursor(('not-a-date', 'abc'), 'next'),
+])
+def test_decode_rejects_invalid_cursor(app, cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, COLUMNS)
+
+
+def _seed(count):
+    leader = make_user('leader', role='team_leader')
+    # 每三条共用一个创建时间，验证按主键打破并列
+    base = datetime(2024, 1, 1)
+    for index in range(count):
+        make_achievement(leader, created_at=base + timedelta(minutes=index // 3))
+    return Achievement.query.order_by(
+        Achievement.created_at.desc(), Achievement.achievement_id.desc()
+    ).all()
+
+
+def _page(cursor, per_page=4):
+    return keyset_paginate(
+        Achievement.query, Achievement.created_at, Achievement.achievement_id, cursor, per_page
+    )
+
+
+def test_forward_and_backward_walk_over_ties(app):
+    expected = _seed(11)
+
+    pages = []
+    cursor = ''
+    while True:
+        items, next_cursor, prev_cursor = _page(cursor)
+        assert (prev_cursor is None) == (not pages)
+        pages.append((items, prev_cursor))
+        if next_cursor is None:
+            break
+        cursor = next_cursor
+
+    walked = [item for items, _ in pages for item in items]
+    assert walked == expected
+    assert [len(items) for items, _ in pages] == [4, 4, 3]
+
+    # 从每一页的 prev 游标回到上一页
+    for number in range(1, len(pages)):
+        items, next_cursor, _ = _page(pages[number][1])
+        assert items == pages[number - 1][0]
+        assert next_cursor is not None
+
+
+def test_route_rejects_invalid_cursor(client):
+    admin = make_user('admin', role='admin')
+    response = client.get('/api/admin/achievements?cursor=garbage', headers=auth_headers(admin))
+    assert response.status_code == 400
+
+
+def test_route_pages_with_cursor(client):
+    admin = make_user('admin', role='admin')
+    expected = [a.achievement_id for a in _seed(5)]
+    headers = auth_headers(admin)
+
+    first = client.get('/api/admin/achievements?cursor=&per_page=3', headers=headers).get_json()
+    second = client.get(
+        f"/api/admin/achievements?cursor={first['next_cursor']}&per_page=3", headers=headers
+    ).get_json()
+
+    ids = [a['achievement_id'] for a in first['achievements'] + second['achievements']]
+    assert ids == expected
+    assert second['next_cursor'] is None
@@ -0,0 +1,102 @@
+from datetime import date
+
+from app import db
+from app.models import AchievementStat
+from app.utils.bulk import bulk_update_achievements, transition_pending
+
+from .conftest import auth_headers, make_achievement, make_class, make_user
+
+
+def snapshot():
+    """汇总表中计数非零的行"""
+    return {
+        (row.scope, row.scope_id, row.status, row.type, row.level, row.award_year): row.count
+        for row in AchievementStat.query.all() if row.count
+    }
+
+
+def assert_matches_rebuild():
+    """增量维护的结果应与全量重算一致"""
+    incremental = snapshot()
+    AchievementStat.rebuild()
+    assert incremental == snapshot()
+    return incremental
+
+
+def _seed():
+    first, second = make_class('一班'), make_class('二班')
+    leader = make_user('leader', role='team_leader', class_id=first.class_id)
+    student = make_user('student', class_id=first.class_id)
+    achievements = [
+        make_achievement(leader, student),
+        make_achievement(leader, student, type='competition', level='national'),
+        make_achievement(leader, status='approved', award_date=date(2023, 9, 1)),
+    ]
+    return leader, student, first, second, achievements
+
+
+def test_orm_changes_update_stats(app):
+    leader, student, _, second, achievements = _seed()
+    counts = assert_matches_rebuild()
+    assert counts[('global', '', 'pending', 'paper', 'school', 2024)] == 1
+    assert counts[('class', student.class_id, 'pending', 'competition', 'national', 2024)] == 1
+
+    achievements[0].status = 'approved'
+    achievements[1].class_id = second.class_id
+    achievements[1].award_date = date(2022, 1, 1)
+    db.session.commit()
+    assert_matches_rebuild()
+
+    db.session.delete(achievements[2])
+    db.session.commit()
+    counts = assert_matches_rebuild()
+    assert counts[('class', second.class_id, 'pending', 'competition', 'national', 2022)] == 1
+
+
+def test_bulk_update_adjusts_stats(app):
+    leader, _, _, second, achievements = _seed()
+    ids = [a.achievement_id for a in achievements]
+
+    assert bulk_update_achievements(ids, {'status': 'returned'}) == 3
+    db.session.commit()
+    assert_matches_rebuild()
+
+    # 带 leader_id 时只更新本队成果
+    assert bulk_update_achievements(ids, {'class_id': second.class_id}, leader_id='other') == 0
+    assert bulk_update_achievements(ids, {'class_id': second.class_id}, leader_id=leader.user_id) == 3
+    db.session.commit()
+    counts = assert_matches_rebuild()
+    assert sum(count for key, count in counts.items() if key[:2] == ('class', second.class_id)) == 3
+
+
+def test_transition_pending_only_moves_pending(app):
+    leader, _, _, _, achievements = _seed()
+    ids = [a.achievement_id for a in achievements]
+
+    moved = transition_pending(ids, 'approved', leader.user_id)
+    db.session.commit()
+    assert sorted(moved) == sorted(ids[:2])
+    assert transition_pending(ids, 'rejected', leader.user_id) == []
+    counts = assert_matches_rebuild()
+    assert counts[('leader', leader.user_id, 'approved', 'paper', 'school', 2024)] == 1
+    assert ('leader', leader.user_id, 'pending', 'paper', 'school', 2024) not in counts
+
+
+def test_deleting_user_and_class_detaches_stats(client):
+    leader, student, first, second, achievements = _seed()
+    admin = make_user('admin', role='admin')
+    headers = auth_headers(admin)
+    achievements[2].class_id = second.class_id
+    db.session.commit()
+
+    response = client.delete(f'/api/admin/users/{student.user_id}', headers=headers)
+    assert response.status_code == 200
+    counts = assert_matches_rebuild()
+    assert not any(key[:2] == ('submitter', student.user_id) for key in counts)
+    assert counts[('global', '', 'pending', 'paper', 'school', 2024)] == 1
+
+    response = client.delete(f'/api/admin/classes/{second.class_id}', headers=headers)
+    assert response.status_code == 200
+    counts = assert_matches_rebuild()
+    assert not any(key[:2] == ('class', second.class_id) for key in counts)
+    assert sum(count for key, count in counts.items() if key[0] == 'global') == 3